@@ -13,7 +13,7 @@ Copyright (c) 2026 Andre. All rights reserved.
 
 import uuid
 from collections import defaultdict
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Dict, Optional
 from abc import ABC, abstractmethod
@@ -24,6 +24,13 @@ from utils.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
+# JSON export converters keyed by exact type
+_JSON_SERIALIZERS = {
+    Decimal: float,
+    date: date.isoformat,
+    datetime: datetime.isoformat,
+}
+
 
 class LotMatchingStrategy(ABC):
     """Abstract base class for lot matching algorithms."""
@@ -403,6 +410,10 @@ class TaxBasisEngine:
         from decimal import Decimal
         
         def decimal_serializer(obj):
+            # Exact-type dict lookup first; isinstance only for subclasses
+            fn = _JSON_SERIALIZERS.get(type(obj))
+            if fn is not None:
+                return fn(obj)
             if isinstance(obj, Decimal):
                 return float(obj)
             if isinstance(obj, date):
@@ -127,15 +127,29 @@ class TransactionStore:
         
         logger.info(f"TransactionStore initialized (encrypted): {db_path}")
     
+    # Per-connection tuning (not persisted in the database file).
+    # synchronous=NORMAL is durable under WAL; 64MB page cache; temp tables
+    # in RAM; 256MB memory-mapped reads.
+    _CONN_PRAGMAS = """
+        PRAGMA synchronous=NORMAL;
+        PRAGMA cache_size=-65536;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+    """
+    
     def _get_conn(self) -> sqlite3.Connection:
         """Get database connection."""
         conn = sqlite3.connect(self.db_path, timeout=30.0)
         conn.row_factory = sqlite3.Row
+        conn.executescript(self._CONN_PRAGMAS)
         return conn
     
     def _init_database(self):
         """Create database tables if they don't exist."""
         with self._get_conn() as conn:
+            # WAL is persistent, so setting it once at init covers every later connection
+            conn.execute("PRAGMA journal_mode=WAL")
+            
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS transactions (
                     id TEXT PRIMARY KEY,
@@ -263,10 +277,24 @@ class TransactionStore:
         
         return hashlib.sha256(hash_input.encode()).hexdigest()
     
-    def _transaction_to_row(self, txn: Transaction, source_name: str, txn_hash: str) -> Dict:
-        """Convert Transaction to database row with encryption."""
+    def _transaction_to_row(
+        self,
+        txn: Transaction,
+        source_name: str,
+        txn_hash: str,
+        import_time: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Convert Transaction to database row with encryption.
+        
+        Args:
+            import_time: Timestamp of the import batch (defaults to now)
+        """
+        if import_time is None:
+            import_time = datetime.now()
+        
         row = {
-            'id': f"{source_name}_{txn_hash[:16]}_{datetime.now().timestamp()}",
+            'id': f"{source_name}_{txn_hash[:16]}_{import_time.timestamp()}",
             'date': txn.date.isoformat(),
             'type': txn.type.value,
             'ticker': txn.ticker,
@@ -287,7 +315,7 @@ class TransactionStore:
             'currency': getattr(txn, 'original_currency', 'EUR'),
             'original_currency': getattr(txn, 'original_currency', 'EUR'),
             'source_name': source_name,
-            'source_import_date': datetime.now().isoformat(),
+            'source_import_date': import_time.isoformat(),
             'transaction_hash': txn_hash,
             'broker': getattr(txn, 'broker', None),
         }
@@ -340,44 +368,68 @@ class TransactionStore:
         added = 0
         skipped = 0
         errors = []
+        rows = []
+        
+        # One timestamp for the whole import (row ids and source_import_date)
+        import_time = datetime.now()
         
         with self._get_conn() as conn:
+            hashes = []
             for txn in transactions:
                 try:
-                    txn_hash = self._generate_transaction_hash(txn)
-                    
-                    # Check if hash already exists
-                    if dedup_strategy == "hash_first":
-                        existing = conn.execute(
-                            "SELECT id FROM transactions WHERE transaction_hash = ?",
-                            (txn_hash,)
-                        ).fetchone()
-                        
-                        if existing:
-                            skipped += 1
-                            continue
-                    
-                    # Convert to row and insert
-                    row = self._transaction_to_row(txn, source_name, txn_hash)
-                    
-                    placeholders = ', '.join(['?' for _ in row])
-                    columns = ', '.join(row.keys())
-                    
-                    conn.execute(
-                        f"INSERT INTO transactions ({columns}) VALUES ({placeholders})",
-                        list(row.values())
-                    )
-                    
-                    added += 1
-                    
+                    hashes.append(self._generate_transaction_hash(txn))
                 except Exception as e:
+                    hashes.append(None)
                     errors.append(f"Error adding transaction: {str(e)}")
                     logger.error(f"Failed to add transaction: {e}", exc_info=True)
             
+            # One indexed lookup for all hashes instead of a SELECT per row
+            seen = set()
+            if dedup_strategy == "hash_first":
+                seen = self._existing_hashes(conn, [h for h in hashes if h])
+            
+            for txn, txn_hash in zip(transactions, hashes):
+                if txn_hash is None:
+                    continue
+                
+                # Skip hashes already stored or earlier in this batch
+                if dedup_strategy == "hash_first":
+                    if txn_hash in seen:
+                        skipped += 1
+                        continue
+                    seen.add(txn_hash)
+                
+                try:
+                    rows.append(self._transaction_to_row(txn, source_name, txn_hash, import_time))
+                except Exception as e:
+                    errors.append(f"Error adding transaction: {str(e)}")
+                    logger.error(f"Failed to add transaction: {e}", exc_info=True)
+            
+            if rows:
+                columns = ', '.join(rows[0].keys())
+                placeholders = ', '.join(['?'] * len(rows[0]))
+                insert_sql = f"INSERT INTO transactions ({columns}) VALUES ({placeholders})"
+                
+                try:
+                    # Single statement, single transaction for the whole batch
+                    conn.executemany(insert_sql, [tuple(row.values()) for row in rows])
+                    added = len(rows)
+                except sqlite3.IntegrityError:
+                    # A row collided (e.g. keep_all with a stored hash): drop the
+                    # partial batch and insert row by row to isolate failures
+                    conn.rollback()
+                    for row in rows:
+                        try:
+                            conn.execute(insert_sql, tuple(row.values()))
+                            added += 1
+                        except Exception as e:
+                            errors.append(f"Error adding transaction: {str(e)}")
+                            logger.error(f"Failed to add transaction: {e}", exc_info=True)
+            
             conn.commit()
         
         # Record import history
-        self._record_import(source_name, added, skipped, len(errors))
+        self._record_import(source_name, added, skipped, len(errors), import_time)
         
         logger.info(f"Import complete: {added} added, {skipped} skipped, {len(errors)} errors")
         
@@ -389,8 +441,35 @@ class TransactionStore:
             errors=errors
         )
     
-    def _record_import(self, source_name: str, added: int, skipped: int, error_count: int):
+    # Stay under SQLite's host-parameter limit on older builds (999)
+    _HASH_LOOKUP_CHUNK = 900
+    
+    def _existing_hashes(self, conn: sqlite3.Connection, hashes: List[str]) -> set:
+        """Return the subset of hashes already present in the transactions table."""
+        existing = set()
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), self._HASH_LOOKUP_CHUNK):
+            chunk = unique[i:i + self._HASH_LOOKUP_CHUNK]
+            placeholders = ','.join(['?'] * len(chunk))
+            rows = conn.execute(
+                f"SELECT transaction_hash FROM transactions WHERE transaction_hash IN ({placeholders})",
+                chunk
+            ).fetchall()
+            existing.update(row['transaction_hash'] for row in rows)
+        return existing
+    
+    def _record_import(
+        self,
+        source_name: str,
+        added: int,
+        skipped: int,
+        error_count: int,
+        import_time: Optional[datetime] = None
+    ):
         """Record import to history table."""
+        if import_time is None:
+            import_time = datetime.now()
+        
         with self._get_conn() as conn:
             conn.execute("""
                 INSERT INTO import_history 
@@ -398,8 +477,8 @@ class TransactionStore:
                  transactions_skipped, transactions_flagged, status)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (
-                f"{source_name}_{datetime.now().timestamp()}",
-                datetime.now().isoformat(),
+                f"{source_name}_{import_time.timestamp()}",
+                import_time.isoformat(),
                 source_name,
                 added,
                 skipped,
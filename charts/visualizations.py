@@ -1,11 +1,14 @@
 """Visualization components using Plotly for interactive charts."""
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px 
 import pandas as pd
+import streamlit as st
 
 from utils.logging_config import setup_logger
+from utils.lttb import lttb_indices
 
 logger = setup_logger(__name__)
 
@@ -17,8 +20,12 @@ logger = setup_logger(__name__)
 DESKTOP_HEIGHT = 520
 MOBILE_HEIGHT = 320
 
+# Max points per performance trace; longer histories are LTTB-downsampled
+PERF_MAX_POINTS = 1500
+
 # Shared Typography
 CHART_TITLE_FONT = dict(size=18, family="JetBrains Mono", color="#e6e6e6")
+COMPACT_TITLE_FONT = dict(CHART_TITLE_FONT, size=14)
 CHART_LEGEND_FONT = dict(color='#E5E7EB', family="Inter")
 
 # Hover Label Styling
@@ -29,8 +36,8 @@ CHART_HOVER_LABEL = dict(
     font_family='JetBrains Mono'
 )
 
-# Shared Moonlit Palette
-MOONLIT_COLORS = [
+# Shared Moonlit Palette (immutable, shared by every chart call)
+MOONLIT_COLORS = (
     'rgba(30, 58, 138, 0.65)',   # Deep Blue
     'rgba(124, 58, 237, 0.65)',  # Purple
     'rgba(16, 185, 129, 0.65)',  # Emerald
@@ -46,8 +53,203 @@ MOONLIT_COLORS = [
     'rgba(248, 113, 113, 0.60)', # Red
     'rgba(96, 165, 250, 0.65)',  # Blue Light
     'rgba(167, 139, 250, 0.65)', # Purple Light
+)
+
+
+# ========================================
+# SHARED LAYOUTS
+# ========================================
+# Built once at import; chart functions merge in only the per-call fields
+# (title, margins that depend on the title, annotations).
+
+# Hover templates keyed by privacy_mode (masked values when True)
+_MASK = "••••••"
+_HOVER_DONUT = {
+    False: '<b>%{label}</b><br>€%{value:,.2f}<br>%{percent}<br><extra></extra>',
+    True: f'<b>%{{label}}</b><br>{_MASK}<br>%{{percent}}<br><extra></extra>',
+}
+_HOVER_TREEMAP = {
+    False: '<b>%{label}</b><br>Value: €%{value:,.0f}<br>Share: %{percentRoot:.1%}<br><extra></extra>',
+    True: f'<b>%{{label}}</b><br>Value: {_MASK}<br>Share: %{{percentRoot:.1%}}<br><extra></extra>',
+}
+_HOVER_DEPOSITS = {
+    False: '<b>Deposits</b>: €%{y:,.0f}<extra></extra>',
+    True: f'<b>Deposits</b>: {_MASK}<extra></extra>',
+}
+_HOVER_COST = {
+    False: '<b>Cost</b>: €%{y:,.0f}<extra></extra>',
+    True: f'<b>Cost</b>: {_MASK}<extra></extra>',
+}
+_HOVER_NET_WORTH = {
+    False: '<b>Net Worth</b>: €%{y:,.0f}<extra></extra>',
+    True: f'<b>Net Worth</b>: {_MASK}<extra></extra>',
+}
+
+# Transparent backgrounds shared by every chart (the card supplies the surface)
+_BASE_LAYOUT = dict(
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+)
+
+# Donut and treemap share the Inter body font
+_ALLOCATION_LAYOUT_BASE = dict(
+    _BASE_LAYOUT,
+    font=dict(family="Inter", color="#9CA3AF"),
+)
+
+_DONUT_LEGEND_BASE = dict(
+    orientation="h",
+    yanchor="bottom",
+    xanchor="center",
+    x=0.5,
+    bgcolor='rgba(0,0,0,0)',
+)
+
+# Legend Logic:
+# Desktop: Hide (Immersive)
+# Mobile: Show (Touch accessibility)
+_DONUT_LAYOUT = {
+    True: dict(
+        _ALLOCATION_LAYOUT_BASE,
+        showlegend=True,
+        legend=dict(_DONUT_LEGEND_BASE, y=-0.05, font=dict(**CHART_LEGEND_FONT, size=9), itemwidth=50),
+        height=MOBILE_HEIGHT,
+    ),
+    False: dict(
+        _ALLOCATION_LAYOUT_BASE,
+        showlegend=False,
+        legend=dict(_DONUT_LEGEND_BASE, y=-0.1, font=dict(**CHART_LEGEND_FONT, size=11), itemwidth=70),
+        height=DESKTOP_HEIGHT,
+    ),
+}
+
+# (margin_b, margin_l/r, margin_t when titled) per compact_mode
+_DONUT_MARGINS = {
+    True: (0, 20, 40),
+    False: (40, 40, 60),
+}
+
+_PERF_GRID_AXIS = dict(
+    showgrid=True,
+    gridcolor='rgba(255,255,255,0.08)',
+    gridwidth=1,
+    griddash='dot',
+    zeroline=False,
+    tickfont=dict(color='#9CA3AF'),
+)
+
+_PERF_RANGE_BUTTONS = [
+    dict(count=1, label="1M", step="month", stepmode="backward"),
+    dict(count=3, label="3M", step="month", stepmode="backward"),
+    dict(count=6, label="6M", step="month", stepmode="backward"),
+    dict(count=1, label="1Y", step="year", stepmode="backward"),
+    dict(step="all", label="ALL")
 ]
 
+
+def _build_perf_layout(compact_mode: bool) -> dict:
+    """Static layout for create_performance_chart (everything except title and y tick labels)."""
+    return dict(
+        _BASE_LAYOUT,
+        xaxis=dict(
+            _PERF_GRID_AXIS,
+            showline=True,
+            linecolor='#374151',
+            rangeselector=dict(
+                buttons=_PERF_RANGE_BUTTONS,
+                bgcolor='rgba(20, 20, 20, 0.9)', 
+                activecolor='#3b82f6',
+                bordercolor='#30363d',
+                borderwidth=1,
+                font=dict(color='#FFFFFF', size=13, weight=700),
+                y=-0.25 if compact_mode else -0.12,
+                x=1,
+                xanchor='right',
+                yanchor='top'
+            )
+        ),
+        yaxis=dict(_PERF_GRID_AXIS, tickformat='s'),
+        hovermode='x unified',
+        # Spike line always follows the cursor; skips the per-point distance search
+        spikedistance=-1,
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            # Move legend further down if we ever show it, to avoid collision
+            y=-0.50 if compact_mode else 1.00,
+            xanchor='center',
+            x=0.5,
+            font=dict(**CHART_LEGEND_FONT, size=9 if compact_mode else 12),
+            bgcolor='rgba(0,0,0,0)',
+            itemsizing='constant',
+            entrywidth=80 if compact_mode else 90,
+        ),
+        showlegend=not compact_mode,
+        height=MOBILE_HEIGHT if compact_mode else DESKTOP_HEIGHT,
+        # Increase bottom margin significantly for mobile to fit selector
+        margin=dict(t=30 if compact_mode else 60, b=110 if compact_mode else 50, l=0, r=20),
+        font=dict(family="JetBrains Mono", size=11)
+    )
+
+
+_PERF_LAYOUT = {compact: _build_perf_layout(compact) for compact in (True, False)}
+
+_BAR_LAYOUT = dict(
+    _BASE_LAYOUT,
+    xaxis=dict(
+        tickfont=dict(color='#9CA3AF'),
+        showgrid=False
+    ),
+    yaxis=dict(
+        gridcolor='rgba(255,255,255,0.05)',
+        tickfont=dict(color='#9CA3AF')
+    ),
+    height=300,
+    margin=dict(t=40, b=20, l=40, r=20),
+    font=dict(family="Inter"),
+)
+
+# Template for empty-input short-circuits. Callers resize the returned figure,
+# so hand out copies (go.Figure(_EMPTY_FIG)) rather than the shared instance.
+_EMPTY_FIG = go.Figure()
+
+
+def _market_value_col(holdings_df: pd.DataFrame) -> str:
+    """Prefer the EUR-converted market value column when present."""
+    return 'Market Value (EUR)' if 'Market Value (EUR)' in holdings_df.columns else 'Market Value'
+
+
+def _title_dict(title: Optional[str], font: dict = CHART_TITLE_FONT) -> dict:
+    """Left-aligned container title, or an empty title when none is given."""
+    if not title:
+        return dict(text="")
+    return dict(text=title, x=0, xref="container", font=dict(**font))
+
+
+def _top_n_others(mv: np.ndarray, top_n: int) -> Tuple[np.ndarray, float]:
+    """
+    Split market values into the top_n largest positions and an "Others" remainder.
+    
+    Uses a partial sort (argpartition) so only the top_n slice is fully ordered.
+    
+    Returns:
+        (top_idx, other_sum) with top_idx ordered by value descending
+    """
+    if len(mv) <= top_n:
+        return np.argsort(-mv, kind='stable'), 0.0
+    
+    candidates = np.argpartition(-mv, top_n - 1)[:top_n]
+    top_idx = candidates[np.argsort(-mv[candidates], kind='stable')]
+    
+    tail_mask = np.ones(len(mv), dtype=bool)
+    tail_mask[top_idx] = False
+    other_sum = float(mv[tail_mask].sum())
+    
+    return top_idx, other_sum
+
+
+# Figures are pure functions of their inputs; reruns reuse the cached build.
+@st.cache_data(ttl=300, show_spinner=False)
 def create_allocation_donut(
     holdings_df: pd.DataFrame, 
     min_pct: float = 2.0, 
@@ -62,123 +264,61 @@ def create_allocation_donut(
         compact_mode: If True, generates a compact chart for mobile (smaller height, tighter margins)
     """
     if holdings_df.empty:
-        return go.Figure()
+        return go.Figure(_EMPTY_FIG)
     
     # Calculate total value
-    market_value_col = 'Market Value (EUR)' if 'Market Value (EUR)' in holdings_df.columns else 'Market Value'
-    total_value = holdings_df[market_value_col].sum()
+    market_value_col = _market_value_col(holdings_df)
+    mv = holdings_df[market_value_col].to_numpy(dtype=np.float64)
+    total_value = np.nansum(mv)
     
     if total_value <= 0:
-        return go.Figure()
-    
-    # Calculate percentages
-    holdings_df = holdings_df.copy()
-    holdings_df['Percentage'] = (holdings_df[market_value_col] / total_value) * 100
-    
-    # Use Name for display
-    if 'Name' in holdings_df.columns:
-        holdings_df['Display_Label'] = holdings_df.apply(
-            lambda row: row['Name'] if row['Name'] and row['Name'] != row['Ticker'] else row['Ticker'],
-            axis=1
-        )
-    else:
-        holdings_df['Display_Label'] = holdings_df['Ticker']
-    
-    # Sort by value descending
-    holdings_df = holdings_df.sort_values(market_value_col, ascending=False)
-    
-    # Take Top 15
+        return go.Figure(_EMPTY_FIG)
+    
+    # Use Name for display, falling back to Ticker when Name is missing or redundant.
+    # Compared as string dtype so the mask is built by vectorized string kernels.
+    # A missing Name column behaves like an all-NA one.
+    # Held as a local array: the caller's frame is only read, never copied.
+    tickers = holdings_df['Ticker'].astype('string')
+    names = holdings_df.get('Name', pd.Series(pd.NA, index=holdings_df.index)).astype('string')
+    use_name = (names.notna() & (names != '') & (names != tickers)).fillna(False)
+    display_labels = names.where(use_name, tickers).to_numpy(dtype=object)
+    
+    # Take Top 15, bucket the remainder into "Others" (one partial sort on the
+    # value array; the chart is fed straight from the selected slices)
     top_n = 15
+    top_idx, other_val = _top_n_others(mv, top_n)
+    labels = display_labels[top_idx]
+    values = mv[top_idx]
     
-    if len(holdings_df) > top_n:
-        large_holdings = holdings_df.iloc[:top_n].copy()
-        small_holdings = holdings_df.iloc[top_n:]
+    if len(mv) > top_n:
+        labels = np.append(labels, 'Others')
+        values = np.append(values, other_val)
         
-        if not small_holdings.empty:
-            other_val = small_holdings[market_value_col].sum()
-            other_pct = small_holdings['Percentage'].sum()
-            
-            other_row = pd.DataFrame([{
-                'Display_Label': 'Others',
-                'Ticker': 'OTHERS',
-                market_value_col: other_val,
-                'Percentage': other_pct
-            }])
-            display_df = pd.concat([large_holdings, other_row], ignore_index=True)
-        else:
-            display_df = large_holdings
-    else:
-        display_df = holdings_df
-        
-    # Use Shared Palette
-    colors = MOONLIT_COLORS
-
-    # Privacy masking for hover
-    val_fmt = "€%{value:,.2f}" if not privacy_mode else "••••••"
-
+    # Layout Logic
+    title_dict = _title_dict(title)
+    
+    margin_b, margin_lr, margin_t_titled = _DONUT_MARGINS[compact_mode]
+    layout = {
+        **_DONUT_LAYOUT[compact_mode],
+        'title': title_dict,
+        'margin': dict(t=margin_t_titled if title else 0, b=margin_b, l=margin_lr, r=margin_lr),
+        'annotations': [dict(text=f"{total_value:,.0f} €", x=0.5, y=0.5, font_size=22, showarrow=False, font=dict(family="JetBrains Mono", color="white", weight=700))] if total_value > 0 else [],
+    }
+    
+    # Trace and layout go in at construction: one validation pass, no update_* round trips
     fig = go.Figure(data=[go.Pie(
-        labels=display_df['Display_Label'],
-        values=display_df[market_value_col],
+        labels=labels,
+        values=values,
         hole=0.60,
-        hovertemplate='<b>%{label}</b><br>' +
-                     f'{val_fmt}<br>' +
-                     '%{percent}<br>' +
-                     '<extra></extra>',
+        hoverinfo="label+percent+value",
+        hovertemplate=_HOVER_DONUT[privacy_mode],
         hoverlabel=CHART_HOVER_LABEL,
         textinfo='none',
         marker=dict(
-            colors=colors,
+            colors=MOONLIT_COLORS,
             line=dict(color='#0e1117', width=2)
         )
-    )])
-    
-    # Layout Logic
-    title_dict = dict(text="") if not title else dict(text=title, x=0, xref="container", font=dict(size=18, family="JetBrains Mono", color="#e6e6e6"))
-    
-    # Chart Height
-    final_height = MOBILE_HEIGHT if compact_mode else DESKTOP_HEIGHT
-    
-    # Legend Logic: 
-    # Desktop: Hide (Immersive)
-    # Mobile: Show (Touch accessibility)
-    show_legend_bool = True if compact_mode else False
-
-    if compact_mode:
-        margin_t = 0 if not title else 40
-        margin_b = 0
-        margin_l = 20
-        margin_r = 20
-        legend_y = -0.05
-    else:
-        # Desktop
-        margin_t = 0 if not title else 60
-        margin_b = 40
-        margin_l = 40
-        margin_r = 40
-        legend_y = -0.1
-
-    fig.update_layout(
-        title=title_dict,
-        showlegend=show_legend_bool, 
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.05 if compact_mode else legend_y,
-            xanchor="center",
-            x=0.5,
-            font=dict(**CHART_LEGEND_FONT, size=9 if compact_mode else 11),
-            itemwidth=50 if compact_mode else 70,
-            bgcolor='rgba(0,0,0,0)',
-        ),
-        height=final_height, 
-        margin=dict(t=margin_t, b=0 if compact_mode else margin_b, l=margin_l, r=margin_r), 
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Inter", color="#9CA3AF"),
-        annotations=[dict(text=f"{total_value:,.0f} €", x=0.5, y=0.5, font_size=22, showarrow=False, font=dict(family="JetBrains Mono", color="white", weight=700))] if total_value > 0 else []
-    )
-    
-    fig.update_traces(hole=0.60, hoverinfo="label+percent+value")
+    )], layout=layout)
     
     return fig
 
@@ -194,9 +334,9 @@ def create_allocation_treemap(
     Flat structure with Moonlit aesthetic.
     """
     if holdings_df.empty:
-        return go.Figure()
+        return go.Figure(_EMPTY_FIG)
     
-    market_value_col = 'Market Value (EUR)' if 'Market Value (EUR)' in holdings_df.columns else 'Market Value'
+    market_value_col = _market_value_col(holdings_df)
     
     # Ensure Asset Type exists, default to 'Assets' if missing
     if 'Asset Type' not in holdings_df.columns:
@@ -209,9 +349,6 @@ def create_allocation_treemap(
     # Label Logic: Ticker + %
     holdings_df['Label'] = holdings_df['Ticker']
     
-    # Use Shared Palette
-    colors = MOONLIT_COLORS
-    
     # Use plotly.express (px) for Treemap generation
     # Path "Portfolio" -> "Label" (Ticker)
     fig = px.treemap(
@@ -219,21 +356,16 @@ def create_allocation_treemap(
         path=['Label'], 
         values=market_value_col,
         color='Label', 
-        color_discrete_sequence=colors,
+        color_discrete_sequence=MOONLIT_COLORS,
         hover_data={'Name': True, market_value_col: True, 'Percentage': ':.1f'}
     )
     
-    # Custom Hover Template
-    val_fmt = "€%{value:,.0f}" if not privacy_mode else "••••••"
-    
+    # Custom Hover Template (privacy-masked variant selected by key)
     # Use customdata to access 'Name' (stored in hover_data)
     # px automatically puts hover_data into customdata.
     # Index 0 = Name (based on hover_data dict order usually)
     fig.update_traces(
-        hovertemplate='<b>%{label}</b><br>' +
-                      f'Value: {val_fmt}<br>' +
-                      'Share: %{percentRoot:.1%}<br>' +
-                      '<extra></extra>',
+        hovertemplate=_HOVER_TREEMAP[privacy_mode],
         marker=dict(
             line=dict(width=1, color='rgba(148, 163, 184, 0.2)'), # Subtle slate border
             cornerradius=0 # Sharp edges for clean grid
@@ -253,21 +385,20 @@ def create_allocation_treemap(
     margin_l = 0
     margin_r = 0
         
-    title_dict = dict(text="") if not title else dict(text=title, x=0, xref="container", font=dict(size=18, family="JetBrains Mono", color="#e6e6e6"))
+    title_dict = _title_dict(title)
 
     fig.update_layout(
         title=title_dict,
         height=final_height,
         margin=dict(t=margin_t, b=margin_b, l=margin_l, r=margin_r),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Inter", color="#9CA3AF"),
+        **_ALLOCATION_LAYOUT_BASE,
         uniformtext=dict(minsize=10, mode='hide') # Hide labels if too small
     )
 
     return fig
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def create_performance_chart(
     dates: List[str],
     net_deposits: List[float],
@@ -279,129 +410,77 @@ def create_performance_chart(
 ) -> go.Figure:
     """
     Create chart area for portfolio performance.
-    Includes native Range Selector.
+    Includes native Range Selector. Traces render through WebGL (scattergl)
+    so multi-year daily histories stay responsive.
     
     Args:
         compact_mode: If True, generates a compact chart for mobile (smaller height, tighter margins)
     """
     if not dates or not net_deposits or not portfolio_values:
-        return go.Figure()
-    
-    fig = go.Figure()
-    
-    # Privacy masking
-    val_fmt = "€%{y:,.0f}" if not privacy_mode else "••••••"
+        return go.Figure(_EMPTY_FIG)
+    
+    # Parse dates once. Traces get plain ISO date strings: plotly serializes
+    # datetime64 values as 'YYYY-MM-DDT00:00:00', which bloats the payload
+    x_days = np.asarray(dates, dtype='datetime64[D]')
+    x_num = x_days.astype(np.int64)
+    x = np.datetime_as_string(x_days, unit='D')
+    
+    def _series(values: List[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Downsample long histories with LTTB; short ones pass through."""
+        y = np.asarray(values, dtype=np.float64)
+        if len(y) <= PERF_MAX_POINTS:
+            return x, y
+        idx = lttb_indices(x_num, y, PERF_MAX_POINTS)
+        return x[idx], y[idx]
+    
+    # Layout Configuration (applied at construction)
+    title_dict = _title_dict(title, COMPACT_TITLE_FONT if compact_mode else CHART_TITLE_FONT)
+    perf_layout = _PERF_LAYOUT[compact_mode]
+    fig = go.Figure(layout={
+        **perf_layout,
+        'title': title_dict,
+        'yaxis': dict(perf_layout['yaxis'], showticklabels=not privacy_mode),
+    })
     
     # 1. Net Deposits
-    fig.add_trace(go.Scatter(
-        x=dates,
-        y=net_deposits,
+    x_dep, y_dep = _series(net_deposits)
+    fig.add_trace(go.Scattergl(
+        x=x_dep,
+        y=y_dep,
         name='Net Deposits',
         mode='lines',
         line=dict(color='#64748b', width=2, dash='dot'),
-        hovertemplate=f'<b>Deposits</b>: {val_fmt}<extra></extra>',
+        hovertemplate=_HOVER_DEPOSITS[privacy_mode],
         hoverlabel=CHART_HOVER_LABEL
     ))
     
     # 2. Cost Basis
     if cost_basis_values:
-        fig.add_trace(go.Scatter(
-            x=dates,
-            y=cost_basis_values,
+        x_cost, y_cost = _series(cost_basis_values)
+        fig.add_trace(go.Scattergl(
+            x=x_cost,
+            y=y_cost,
             name='Cost Basis',
             mode='lines',
             line=dict(color='#f59e0b', width=1.5), 
-            hovertemplate=f'<b>Cost</b>: {val_fmt}<extra></extra>',
+            hovertemplate=_HOVER_COST[privacy_mode],
             hoverlabel=CHART_HOVER_LABEL
         ))
     
     # 3. Net Worth
-    fig.add_trace(go.Scatter(
-        x=dates,
-        y=portfolio_values,
+    x_nw, y_nw = _series(portfolio_values)
+    fig.add_trace(go.Scattergl(
+        x=x_nw,
+        y=y_nw,
         name='Net Worth',
         mode='lines',
         line=dict(color='#3b82f6', width=2.5),
         fill='tozeroy', 
         fillcolor='rgba(59, 130, 246, 0.12)',
-        hovertemplate=f'<b>Net Worth</b>: {val_fmt}<extra></extra>',
+        hovertemplate=_HOVER_NET_WORTH[privacy_mode],
         hoverlabel=CHART_HOVER_LABEL
     ))
     
-    # Layout Configuration
-    if compact_mode:
-        title_dict = dict(text="") if not title else dict(text=title, x=0, xref="container", font=dict(size=14, family="JetBrains Mono", color="#e6e6e6"))
-        margin_t = 0 if not title else 40
-        margin_b = 0
-        chart_height = MOBILE_HEIGHT
-    else:
-        title_dict = dict(text="") if not title else dict(text=title, x=0, xref="container", font=dict(**CHART_TITLE_FONT))
-        margin_t = 0 if not title else 60
-        margin_b = 80
-        chart_height = DESKTOP_HEIGHT
-    
-    fig.update_layout(
-        title=title_dict,
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.08)',
-            gridwidth=1,
-            griddash='dot',
-            zeroline=False,
-            showline=True,
-            linecolor='#374151',
-            tickfont=dict(color='#9CA3AF'),
-            rangeselector=dict(
-                buttons=list([
-                    dict(count=1, label="1M", step="month", stepmode="backward"),
-                    dict(count=3, label="3M", step="month", stepmode="backward"),
-                    dict(count=6, label="6M", step="month", stepmode="backward"),
-                    dict(count=1, label="1Y", step="year", stepmode="backward"),
-                    dict(step="all", label="ALL")
-                ]),
-                bgcolor='rgba(20, 20, 20, 0.9)', 
-                activecolor='#3b82f6',
-                bordercolor='#30363d',
-                borderwidth=1,
-                font=dict(color='#FFFFFF', size=13, weight=700),
-                y=-0.12 if not compact_mode else -0.25,
-                x=1,
-                xanchor='right',
-                yanchor='top'
-            )
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255,255,255,0.08)',
-            gridwidth=1,
-            griddash='dot',
-            zeroline=False,
-            tickformat='s',
-            tickfont=dict(color='#9CA3AF'),
-            showticklabels=not privacy_mode 
-        ),
-        hovermode='x unified',
-        legend=dict(
-            orientation='h',
-            yanchor='bottom',
-            # Move legend further down if we ever show it, to avoid collision
-            y=1.00 if not compact_mode else -0.50,
-            xanchor='center',
-            x=0.5,
-            font=dict(**CHART_LEGEND_FONT, size=9 if compact_mode else 12),
-            bgcolor='rgba(0,0,0,0)',
-            itemsizing='constant',
-            entrywidth=80 if compact_mode else 90,
-        ),
-        showlegend=not compact_mode,
-        height=chart_height,
-        # Increase bottom margin significantly for mobile to fit selector
-        margin=dict(t=30 if compact_mode else 60, b=110 if compact_mode else 50, l=0, r=20),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="JetBrains Mono", size=11)
-    )
-    
     return fig
 
 
@@ -409,35 +488,24 @@ def create_simple_bar_chart(data: Dict[str, float], title: str) -> go.Figure:
     """
     Create a simple bar chart (alternative visualization).
     """
+    labels = list(data)
+    values = np.fromiter(data.values(), dtype=np.float64, count=len(labels))
+    
     fig = go.Figure(data=[
         go.Bar(
-            x=list(data.keys()),
-            y=list(data.values()),
+            x=labels,
+            y=values,
             marker_color='#3b82f6',
             marker=dict(line=dict(color='#60A5FA', width=1)),
             hovertemplate='<b>%{x}</b><br>€%{y:,.2f}<extra></extra>'
         )
-    ])
-    
-    fig.update_layout(
-        title={
+    ], layout={
+        **_BAR_LAYOUT,
+        'title': {
             'text': title,
             'x': 0,
             'font': {'size': 14, 'color': '#E5E7EB'}
         },
-        xaxis=dict(
-            tickfont=dict(color='#9CA3AF'),
-            showgrid=False
-        ),
-        yaxis=dict(
-            gridcolor='rgba(255,255,255,0.05)',
-            tickfont=dict(color='#9CA3AF')
-        ),
-        height=300,
-        margin=dict(t=40, b=20, l=40, r=20),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Inter")
-    )
+    })
     
     return fig
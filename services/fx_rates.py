@@ -15,13 +15,18 @@ Falls back to yfinance for unsupported currencies or when central bank APIs fail
 Copyright (c) 2026 Andre. All rights reserved.
 """
 
-import requests
-import xml.etree.ElementTree as ET
+import csv
+import io
+import threading
 from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Optional, Dict, Tuple
-import streamlit as st
+from functools import lru_cache
+from typing import Optional, Dict, FrozenSet, Iterable, Tuple
 
+from dateutil.easter import easter
+
+from utils.http import get_session
 from utils.logging_config import setup_logger
 from services.market_cache import get_market_cache
 
@@ -42,10 +47,48 @@ CENTRAL_BANK_APIS = {
     }
 }
 
+# L1 cache for FXRateService.get_rate, keyed on its arguments. Historical
+# rates don't change, so entries never expire (L2 is the SQLite cache).
+_RATE_CACHE: Dict[Tuple[str, str, date, bool], Tuple[Decimal, str]] = {}
+_CACHE_LOCK = threading.Lock()
+
+# prefetch_rates runs get_rate on a thread pool; yfinance 0.2.x keeps
+# download state in module globals, so its calls must not overlap
+_YF_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _target_holidays(year: int) -> FrozenSet[date]:
+    """TARGET closing days, on which the ECB publishes no reference rates."""
+    easter_sunday = easter(year)
+    return frozenset({
+        date(year, 1, 1),
+        easter_sunday - timedelta(days=2),  # Good Friday
+        easter_sunday + timedelta(days=1),  # Easter Monday
+        date(year, 5, 1),
+        date(year, 12, 25),
+        date(year, 12, 26),
+    })
+
+
+def _is_ecb_publication_day(d: date) -> bool:
+    """Check whether the ECB publishes reference rates on this date."""
+    return d.weekday() < 5 and d not in _target_holidays(d.year)
+
+
+def _ecb_publication_day(d: date) -> date:
+    """Latest ECB publication day on or before d, i.e. the rate in force on d."""
+    while not _is_ecb_publication_day(d):
+        d -= timedelta(days=1)
+    return d
+
 
 class CentralBankRateFetcher:
     """Fetches official FX rates from central banks."""
     
+    # Published ECB reference rates never change; memoize successful lookups
+    _ecb_rates: Dict[Tuple[str, date], float] = {}
+    
     @classmethod
     def fetch_ecb_rate(
         cls, 
@@ -86,6 +129,17 @@ class CentralBankRateFetcher:
     @classmethod
     def _fetch_ecb_direct(cls, currency: str, target_date: date) -> Optional[float]:
         """Fetch direct EUR-based rate from ECB."""
+        cached = cls._ecb_rates.get((currency, target_date))
+        if cached is not None:
+            return cached
+        
+        # No rate is published on weekends/TARGET holidays; the previous
+        # publication day's rate is the one in force
+        publication_day = _ecb_publication_day(target_date)
+        if publication_day != target_date:
+            logger.debug(f"No ECB publication on {target_date}, using {publication_day} for {currency}")
+            return cls._fetch_ecb_direct(currency, publication_day)
+        
         # ECB API endpoint for daily exchange rates
         # Format: EXR/D.{CURRENCY}.EUR.SP00.A
         url = f"https://data-api.ecb.europa.eu/service/data/EXR/D.{currency}.EUR.SP00.A"
@@ -97,30 +151,85 @@ class CentralBankRateFetcher:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = get_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            # Parse CSV response (simple format)
-            lines = response.text.strip().split('\n')
-            if len(lines) < 2:
+            rate = cls._parse_ecb_csv(response.text).get(target_date)
+            if rate is None:
                 logger.warning(f"No ECB data for {currency} on {target_date}")
                 return None
             
-            # Last line contains the data (skip header)
-            data_line = lines[-1]
-            parts = data_line.split(',')
-            
-            # Extract rate (usually last column)
-            rate_str = parts[-1].strip()
-            if rate_str and rate_str != 'NaN':
-                return float(rate_str)
-            
-            return None
+            cls._ecb_rates[(currency, target_date)] = rate
+            return rate
             
         except Exception as e:
             logger.debug(f"ECB API error for {currency}: {e}")
             return None
     
+    @classmethod
+    def fetch_ecb_range(
+        cls,
+        currency: str,
+        start_date: date,
+        end_date: date
+    ) -> Dict[date, float]:
+        """
+        Fetch all daily EUR-based ECB rates for a currency in one request.
+        
+        Args:
+            currency: Quote currency (rate is 1 EUR = X currency)
+            start_date: First day of the range (inclusive)
+            end_date: Last day of the range (inclusive)
+        
+        Returns:
+            Dict mapping publication date to rate (ECB publishes business days only)
+        """
+        url = f"https://data-api.ecb.europa.eu/service/data/EXR/D.{currency}.EUR.SP00.A"
+        
+        params = {
+            "startPeriod": start_date.isoformat(),
+            "endPeriod": end_date.isoformat(),
+            "format": "csvdata"
+        }
+        
+        try:
+            response = get_session().get(url, params=params, timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            logger.debug(f"ECB range API error for {currency}: {e}")
+            return {}
+        
+        rates = cls._parse_ecb_csv(response.text)
+        cls._ecb_rates.update(((currency, d), r) for d, r in rates.items())
+        logger.info(f"ECB range {currency} {start_date}..{end_date}: {len(rates)} rates")
+        return rates
+    
+    @staticmethod
+    def _parse_ecb_csv(text: str) -> Dict[date, float]:
+        """
+        Parse an ECB csvdata response into {date: rate}.
+        
+        Columns are located by header name; the trailing TITLE columns are
+        quoted and contain commas, so naive splitting picks the wrong field.
+        """
+        rates = {}
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, None)
+        if not header or 'TIME_PERIOD' not in header or 'OBS_VALUE' not in header:
+            return rates
+        
+        date_idx = header.index('TIME_PERIOD')
+        value_idx = header.index('OBS_VALUE')
+        for row in reader:
+            try:
+                value = row[value_idx].strip()
+                if value and value != 'NaN':
+                    rates[date.fromisoformat(row[date_idx])] = float(value)
+            except (IndexError, ValueError):
+                continue
+        
+        return rates
+    
     @classmethod
     def fetch_fed_rate(
         cls, 
@@ -148,7 +257,7 @@ class CentralBankRateFetcher:
                 "page[size]": 1
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -182,7 +291,6 @@ class FXRateService:
     """
     
     @classmethod
-    @st.cache_data(ttl=3600)
     def get_rate(
         cls,
         from_currency: str,
@@ -202,6 +310,26 @@ class FXRateService:
         Returns:
             (rate, source) where source is 'CB:ECB', 'CB:Fed', or 'yfinance'
         """
+        key = (from_currency, to_currency, target_date, prefer_official)
+        with _CACHE_LOCK:
+            hit = _RATE_CACHE.get(key)
+        if hit is not None:
+            return hit
+        
+        result = cls._lookup_rate(from_currency, to_currency, target_date, prefer_official)
+        with _CACHE_LOCK:
+            _RATE_CACHE[key] = result
+        return result
+    
+    @classmethod
+    def _lookup_rate(
+        cls,
+        from_currency: str,
+        to_currency: str,
+        target_date: date,
+        prefer_official: bool
+    ) -> Tuple[Decimal, str]:
+        """Resolve a rate through the SQLite cache and the source fallback chain."""
         # Same currency = 1.0
         if from_currency == to_currency:
             return (Decimal(1), "identity")
@@ -262,6 +390,83 @@ class FXRateService:
         
         return (Decimal(str(rate)), source)
     
+    @classmethod
+    def prefetch_rates(
+        cls,
+        pairs: Iterable[Tuple[str, date]],
+        to_currency: str = "EUR",
+        max_workers: int = 8
+    ) -> Dict[Tuple[str, date], Tuple[Decimal, str]]:
+        """
+        Warm the rate caches for many (from_currency, date) pairs concurrently.
+        
+        Lookups are network-bound (central bank APIs, yfinance), so they run on
+        a small thread pool; later get_rate calls for the same pairs are cache hits.
+        
+        Args:
+            pairs: (from_currency, target_date) pairs; duplicates are ignored
+            to_currency: Target currency for every pair
+            max_workers: Maximum concurrent lookups
+        
+        Returns:
+            Dict mapping each pair to its (rate, source)
+        """
+        unique_pairs = [p for p in dict.fromkeys(pairs) if p[0] != to_currency]
+        if not unique_pairs:
+            return {}
+        
+        # Pairs already in SQLite: one bulk read, straight into the L1 cache
+        cached = get_market_cache().get_fx_rates_batch(
+            [(currency, to_currency, target_date) for currency, target_date in unique_pairs]
+        )
+        results = {}
+        with _CACHE_LOCK:
+            for currency, target_date in unique_pairs:
+                rate = cached.get((currency, to_currency, target_date))
+                if rate is not None:
+                    result = (Decimal(str(rate)), "cache")
+                    _RATE_CACHE[(currency, to_currency, target_date, True)] = result
+                    results[(currency, target_date)] = result
+        
+        missing = [p for p in unique_pairs if p not in results]
+        if missing:
+            # EUR legs: one ECB range request per currency instead of one per day
+            if to_currency == "EUR":
+                cls._prefetch_ecb_ranges(missing)
+            
+            def _lookup(pair: Tuple[str, date]) -> Tuple[Decimal, str]:
+                return cls.get_rate(pair[0], to_currency, pair[1])
+            
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+                results.update(zip(missing, executor.map(_lookup, missing)))
+        
+        logger.info(f"Prefetched {len(results)} FX rates to {to_currency} ({len(results) - len(missing)} cached)")
+        return results
+    
+    @classmethod
+    def _prefetch_ecb_ranges(cls, pairs: Iterable[Tuple[str, date]]):
+        """Seed the SQLite cache with ECB rates for X->EUR pairs, one request per currency."""
+        dates_by_currency: Dict[str, list] = {}
+        for currency, target_date in pairs:
+            dates_by_currency.setdefault(currency, []).append(target_date)
+        
+        rows = []
+        for currency, dates in dates_by_currency.items():
+            # Weekend/holiday dates take the previous publication day's rate
+            wanted = {d: _ecb_publication_day(d) for d in dates}
+            rates = CentralBankRateFetcher.fetch_ecb_range(
+                currency, min(wanted.values()), max(wanted.values())
+            )
+            
+            # ECB quotes 1 EUR = X currency; store the inverse like fetch_ecb_rate does
+            rows.extend(
+                (currency, "EUR", rate_date, 1.0 / rates[publication_day])
+                for rate_date, publication_day in wanted.items()
+                if publication_day in rates
+            )
+        
+        get_market_cache().set_fx_rates_batch(rows)
+    
     @classmethod
     def _fetch_yfinance_rate(
         cls,
@@ -279,13 +484,14 @@ class FXRateService:
         end = target_date + timedelta(days=1)
         
         try:
-            data = yf.download(
-                ticker,
-                start=start.strftime('%Y-%m-%d'),
-                end=end.strftime('%Y-%m-%d'),
-                progress=False,
-                auto_adjust=False
-            )
+            with _YF_LOCK:
+                data = yf.download(
+                    ticker,
+                    start=start.strftime('%Y-%m-%d'),
+                    end=end.strftime('%Y-%m-%d'),
+                    progress=False,
+                    auto_adjust=False
+                )
             
             if data.empty:
                 return None
@@ -322,7 +528,8 @@ class FXRateService:
         
         try:
             stock = yf.Ticker(ticker)
-            hist = stock.history(period='1d')
+            with _YF_LOCK:
+                hist = stock.history(period='1d')
             
             if not hist.empty and 'Close' in hist:
                 return float(hist['Close'].iloc[-1])
@@ -335,6 +542,8 @@ class FXRateService:
     
     @classmethod
     def clear_cache(cls):
-        """Clear L1 cache (Streamlit). L2 (SQLite) persists."""
-        st.cache_data.clear()
+        """Clear L1 caches (in-process). L2 (SQLite) persists."""
+        with _CACHE_LOCK:
+            _RATE_CACHE.clear()
+        CentralBankRateFetcher._ecb_rates.clear()
         logger.info("FX rate L1 cache cleared")
@@ -5,6 +5,7 @@ Provides intelligent ISIN-to-ticker mapping for European and US securities.
 """
 
 import re
+from functools import lru_cache
 from typing import Optional, Dict
 from utils.logging_config import setup_logger
 
@@ -14,6 +15,9 @@ logger = setup_logger(__name__)
 class ISINResolver:
     """Resolves ISINs to Yahoo Finance ticker symbols."""
     
+    # ISIN format: 2-letter country code + 9 alphanumeric + 1 check digit
+    _ISIN_RE = re.compile(r'^[A-Z]{2}[A-Z0-9]{9}[0-9]$')
+    
     # Known ISIN patterns for different exchanges
     EXCHANGE_PATTERNS = {
         'DE': '.DE',  # German stocks (Xetra)
@@ -70,42 +74,25 @@ class ISINResolver:
         2. Try OpenFIGI API for automatic resolution
         3. Use provided fallback_ticker
         4. Return ISIN as-is (will use last transaction price)
+        
+        Successful resolutions are memoized in-process; unresolved ISINs are
+        retried on the next call.
         """
         if not isin:
             return fallback_ticker or ""
-            
-        # Check manual overrides first
-        # This works for both ISINs and other identifiers (e.g. BTC)
-        if isin in cls.TICKER_OVERRIDES:
-            override = cls.TICKER_OVERRIDES[isin]
-            logger.info(f"Using manual override for {isin}: {override}")
-            return override
-        
-        # If not an ISIN (length 12), return as is (unless overridden above)
-        if len(isin) != 12:
-             return fallback_ticker or isin
-        
-        # If we have a fallback ticker explicitly provided, use it
-        if fallback_ticker:
-            logger.info(f"Using provided ticker for {isin}: {fallback_ticker}")
-            return fallback_ticker
         
-        # Try OpenFIGI automatic resolution
         try:
-            from services.openfigi_resolver import get_openfigi_resolver
-            resolver = get_openfigi_resolver()
-            ticker = resolver.resolve_isin(isin)
-            
-            if ticker:
-                logger.info(f"OpenFIGI resolved {isin} -> {ticker}")
-                return ticker
-        except Exception as e:
-            logger.warning(f"OpenFIGI resolution failed for {isin}: {e}")
-        
-        # Last resort: return ISIN as-is
-        # Portfolio will use last transaction price as fallback
-        logger.debug(f"Could not resolve {isin}, returning as-is. Add to TICKER_OVERRIDES for manual mapping.")
-        return isin
+            return _resolve_isin_cached(isin, fallback_ticker)
+        except LookupError:
+            # Last resort: return ISIN as-is
+            # Portfolio will use last transaction price as fallback
+            logger.debug(f"Could not resolve {isin}, returning as-is. Add to TICKER_OVERRIDES for manual mapping.")
+            return isin
+    
+    @classmethod
+    def clear_cache(cls):
+        """Clear memoized resolve_isin results (e.g. after editing TICKER_OVERRIDES)."""
+        _resolve_isin_cached.cache_clear()
     
     @classmethod
     def resolve_batch(cls, tickers: list[str]) -> Dict[str, str]:
@@ -113,22 +100,16 @@ class ISINResolver:
         Resolve a batch of tickers/ISINs.
         Returns map of {original_ticker: resolved_ticker}.
         """
-        results = {}
-        isins_to_resolve = []
+        # 1. Check overrides and simple cases (deduplicated, order kept for OpenFIGI)
+        unique = [t for t in dict.fromkeys(tickers) if t]
+        override_hits = cls.TICKER_OVERRIDES.keys() & unique
+        results = {t: cls.TICKER_OVERRIDES[t] for t in override_hits}
         
-        # 1. Check overrides and simple cases
-        for t in tickers:
-            if not t:
-                continue
-                
-            if t in cls.TICKER_OVERRIDES:
-                results[t] = cls.TICKER_OVERRIDES[t]
-            elif len(t) == 12 and re.match(r'^[A-Z]{2}[A-Z0-9]{9}[0-9]$', t):
-                # Is likely an ISIN, needs OpenFIGI
-                isins_to_resolve.append(t)
-            else:
-                # Not an ISIN, assume it's already a ticker
-                results[t] = t
+        remaining = [t for t in unique if t not in override_hits]
+        # Likely ISINs need OpenFIGI; anything else is assumed to already be a ticker
+        isins_to_resolve = [t for t in remaining if cls._is_isin(t)]
+        pending = set(isins_to_resolve)
+        results.update((t, t) for t in remaining if t not in pending)
                 
         # 2. Batch resolve ISINs
         if isins_to_resolve:
@@ -162,9 +143,49 @@ class ISINResolver:
         if identifier in cls.TICKER_OVERRIDES:
             return True
             
-        # ISIN format: 2-letter country code + 9 alphanumeric + 1 check digit
-        if len(identifier) != 12:
-            return False
+        return cls._is_isin(identifier)
+    
+    @classmethod
+    def _is_isin(cls, identifier: str) -> bool:
+        """Check the ISIN format; the length test rejects most plain tickers before the regex."""
+        return len(identifier) == 12 and cls._ISIN_RE.match(identifier) is not None
+
+
+@lru_cache(maxsize=8192)
+def _resolve_isin_cached(isin: str, fallback_ticker: Optional[str]) -> str:
+    """
+    Resolve a non-empty identifier for ISINResolver.resolve_isin.
+    
+    Raises:
+        LookupError: If nothing resolved; exceptions are not cached by lru_cache,
+            so failed OpenFIGI lookups are retried like before.
+    """
+    # Check manual overrides first
+    # This works for both ISINs and other identifiers (e.g. BTC)
+    if isin in ISINResolver.TICKER_OVERRIDES:
+        override = ISINResolver.TICKER_OVERRIDES[isin]
+        logger.info(f"Using manual override for {isin}: {override}")
+        return override
+    
+    # If not an ISIN (length 12), return as is (unless overridden above)
+    if len(isin) != 12:
+        return fallback_ticker or isin
+    
+    # If we have a fallback ticker explicitly provided, use it
+    if fallback_ticker:
+        logger.info(f"Using provided ticker for {isin}: {fallback_ticker}")
+        return fallback_ticker
+    
+    # Try OpenFIGI automatic resolution
+    try:
+        from services.openfigi_resolver import get_openfigi_resolver
+        resolver = get_openfigi_resolver()
+        ticker = resolver.resolve_isin(isin)
         
-        # Check if it matches ISIN pattern
-        return bool(re.match(r'^[A-Z]{2}[A-Z0-9]{9}[0-9]$', identifier))
+        if ticker:
+            logger.info(f"OpenFIGI resolved {isin} -> {ticker}")
+            return ticker
+    except Exception as e:
+        logger.warning(f"OpenFIGI resolution failed for {isin}: {e}")
+    
+    raise LookupError(isin)
@@ -5,10 +5,15 @@ Stores historical prices, split data, FX rates, and ISIN mappings to minimize AP
 """
 
 import sqlite3
+import threading
+import time
+from functools import lru_cache
+from itertools import chain
 from datetime import datetime, date, timedelta
 from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 from cryptography.fernet import Fernet
@@ -17,6 +22,41 @@ from utils.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
+# SQLite's default bound-parameter limit per statement
+_MAX_SQL_PARAMS = 999
+
+# (date position, ticker position, price) rows for get_historical_prices
+_PRICE_RECORD = np.dtype([('date', np.intp), ('ticker', np.intp), ('price', np.float64)])
+
+# How long a "not in cache" answer is trusted before SQLite is asked again
+_MISS_TTL_SECONDS = 300.0
+
+# Size caps for the in-process memos; a full memo is simply emptied and
+# refills from SQLite, which is cheap compared to tracking recency
+_MEMO_MAX_ENTRIES = 100_000
+_MISS_MAX_ENTRIES = 10_000
+
+# Larger writes (e.g. historical backfills) are not copied into the memos;
+# they are rarely point-looked-up and would evict the hot entries
+_MEMO_WRITE_THROUGH_MAX = 1_000
+
+
+@lru_cache(maxsize=64)
+def _upsert_sql(table: str, keys: Tuple[str, ...], values: Tuple[str, ...], n_rows: int = 1) -> str:
+    """
+    Build (once per shape) an upsert with n_rows VALUES groups.
+    
+    ON CONFLICT ... DO UPDATE rewrites the existing row in place; INSERT OR REPLACE
+    would delete it and insert a new one, touching every index twice.
+    """
+    columns = keys + values
+    group = '(' + ', '.join('?' * len(columns)) + ')'
+    updates = ', '.join(f"{col} = excluded.{col}" for col in values)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ','.join([group] * n_rows)
+        + f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}, created_at = CURRENT_TIMESTAMP"
+    )
+
 
 class MarketDataCache:
     """
@@ -29,6 +69,9 @@ class MarketDataCache:
     - isin_map: ISIN to Ticker resolution
     """
     
+    _initialized_paths: set = set()
+    _init_lock = threading.Lock()
+    
     def __init__(self, db_path: str = "data/market_cache.db"):
         """
         Initialize market data cache.
@@ -38,7 +81,25 @@ class MarketDataCache:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._init_db()
+        self._local = threading.local()
+        
+        # Schema, indexes and PRAGMA optimize only need to run once per file
+        # per process, however many instances point at it
+        with self._init_lock:
+            resolved = self.db_path.resolve()
+            if resolved not in self._initialized_paths:
+                self._init_db()
+                self._initialized_paths.add(resolved)
+        
+        # In-process copies of cached rows for hot point lookups; the setters
+        # keep them in sync and clear_cache() drops them. Worker threads share
+        # these dicts, so code that iterates them works on list() snapshots.
+        self._price_memo: Dict[Tuple[str, date], float] = {}
+        self._fx_memo: Dict[Tuple[str, str, date], float] = {}
+        self._isin_memo: Dict[str, str] = {}
+        # Expiry deadlines (time.monotonic) for recent price/FX misses; the
+        # setters fill the memos above, which are checked first
+        self._misses: Dict[tuple, float] = {}
         
         # Initialize encryption
         self.fernet = None
@@ -55,10 +116,87 @@ class MarketDataCache:
         except Exception as e:
             logger.warning(f"Failed to initialize encryption: {e}")
     
+    # Per-connection settings; NORMAL is durable enough under WAL and skips
+    # the fsync on every commit. A larger page cache and memory-mapped reads
+    # keep the hot working set out of read() syscalls.
+    _CONN_PRAGMAS = """
+        PRAGMA synchronous=NORMAL;
+        PRAGMA cache_size=-65536;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+    """
+    
     def _get_conn(self) -> sqlite3.Connection:
-        """Get a configured database connection."""
-        # Timeout increased to 30s to handle concurrent writes
-        return sqlite3.connect(self.db_path, timeout=30.0)
+        """
+        Get this thread's configured database connection.
+        
+        Connections are opened once per thread and reused, so the open and
+        PRAGMA setup (and SQLite's page cache) aren't paid on every query.
+        `with conn:` still commits/rolls back per call without closing it.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Timeout increased to 30s to handle concurrent writes. The IN (...)
+            # lookups produce one SQL text per batch size, so keep more prepared
+            # statements than the default 128 to avoid re-parsing them.
+            conn = sqlite3.connect(self.db_path, timeout=30.0, cached_statements=512)
+            conn.executescript(self._CONN_PRAGMAS)
+            self._local.conn = conn
+        return conn
+
+    def _upsert_rows(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        keys: Tuple[str, ...],
+        values: Tuple[str, ...],
+        rows: List[tuple]
+    ):
+        """Upsert (keys + values) rows using multi-row statements sized to the parameter limit."""
+        chunk = _MAX_SQL_PARAMS // (len(keys) + len(values))
+        for i in range(0, len(rows), chunk):
+            batch = rows[i:i + chunk]
+            conn.execute(
+                _upsert_sql(table, keys, values, len(batch)),
+                list(chain.from_iterable(batch))
+            )
+
+    def _query_scalar(self, sql: str, params: tuple):
+        """Return the first column of the first row, or None if there is no row."""
+        row = self._get_conn().execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def _remember(self, memo: dict, items: List[tuple]):
+        """Store (key, value) items in memo, emptying it first if it would exceed its cap."""
+        if len(items) > min(_MEMO_WRITE_THROUGH_MAX, _MEMO_MAX_ENTRIES):
+            # Bulk write: leave the memo as is, minus any copies it makes stale
+            for key, _ in items:
+                memo.pop(key, None)
+            return
+        if len(memo) + len(items) > _MEMO_MAX_ENTRIES:
+            memo.clear()
+        memo.update(items)
+
+    def _record_miss(self, key: tuple):
+        """Remember that key is not cached, pruning expired misses once the dict is full."""
+        now = time.monotonic()
+        if len(self._misses) >= _MISS_MAX_ENTRIES:
+            for stale, deadline in list(self._misses.items()):
+                if deadline <= now:
+                    self._misses.pop(stale, None)
+            if len(self._misses) >= _MISS_MAX_ENTRIES:
+                self._misses.clear()
+        self._misses[key] = now + _MISS_TTL_SECONDS
+
+    def _is_recent_miss(self, key: tuple) -> bool:
+        """Check whether key was looked up and not found within the miss TTL."""
+        deadline = self._misses.get(key)
+        if deadline is None:
+            return False
+        if deadline > time.monotonic():
+            return True
+        self._misses.pop(key, None)
+        return False
 
     def _init_db(self):
         """Create database tables if they don't exist."""
@@ -125,9 +263,22 @@ class MarketDataCache:
             """)
             
             # Indexes
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_prices_ticker ON prices(ticker, date DESC)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_splits_ticker ON splits(ticker, split_date DESC)")
             
+            # Covering indexes: range/latest reads are answered from the index
+            # pages alone, without a second lookup into the table. For prices a
+            # single (ticker, date DESC, price) index serves the range, batch,
+            # latest and window queries, and replaces the older (ticker, date
+            # DESC) and (ticker, date, price) indexes so writes maintain one
+            # extra B-tree, not two
+            cursor.execute("DROP INDEX IF EXISTS idx_prices_ticker")
+            cursor.execute("DROP INDEX IF EXISTS idx_prices_covering")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_prices_lookup ON prices(ticker, date DESC, price)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_fx_rates_covering ON fx_rates(from_curr, to_curr, date, rate)")
+            
+            # Refresh planner statistics where they are stale (cheap when they aren't)
+            cursor.execute("PRAGMA optimize")
+            
             conn.commit()
             logger.info(f"Initialized market data cache at {self.db_path}")
     
@@ -138,14 +289,22 @@ class MarketDataCache:
         if target_date is None:
             target_date = date.today()
         
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT price FROM prices WHERE ticker = ? AND date = ?",
-                (ticker, target_date)
-            )
-            result = cursor.fetchone()
-            return float(result[0]) if result else None
+        key = (ticker, target_date)
+        price = self._price_memo.get(key)
+        if price is not None:
+            return price
+        if self._is_recent_miss(key):
+            return None
+        
+        price = self._query_scalar(
+            "SELECT price FROM prices WHERE ticker = ? AND date = ?",
+            (ticker, target_date)
+        )
+        if price is None:
+            self._record_miss(key)
+            return None
+        self._remember(self._price_memo, [(key, price)])
+        return price
     
     def set_price(self, ticker: str, price: float, target_date: Optional[date] = None, source: str = "yfinance"):
         """Cache a price for a ticker on a specific date."""
@@ -155,10 +314,11 @@ class MarketDataCache:
         with self._get_conn() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "INSERT OR REPLACE INTO prices (ticker, date, price, source) VALUES (?, ?, ?, ?)",
+                _upsert_sql('prices', ('ticker', 'date'), ('price', 'source')),
                 (ticker, target_date, price, source)
             )
             conn.commit()
+        self._remember(self._price_memo, [((ticker, target_date), float(price))])
     
     def get_prices_batch(self, tickers: List[str], target_date: Optional[date] = None) -> Dict[str, Optional[float]]:
         """
@@ -166,10 +326,22 @@ class MarketDataCache:
         If target_date is provided, gets prices for that specific date.
         If target_date is None, gets the LATEST available price for each ticker.
         """
-        prices = {t: None for t in tickers}
+        prices = dict.fromkeys(tickers)
         
         if not tickers:
             return prices
+        
+        if len(prices) == 1:
+            # Single ticker: point lookup (memoized) or one-row latest query
+            ticker = tickers[0]
+            if target_date:
+                prices[ticker] = self.get_price(ticker, target_date)
+            else:
+                prices[ticker] = self._query_scalar(
+                    "SELECT price FROM prices WHERE ticker = ? ORDER BY date DESC LIMIT 1",
+                    (ticker,)
+                )
+            return prices
 
         with self._get_conn() as conn:
             cursor = conn.cursor()
@@ -199,10 +371,11 @@ class MarketDataCache:
                 """
                 cursor.execute(query, tickers)
             
-            for ticker, price in cursor.fetchall():
-                prices[ticker] = float(price)
+            # price is a REAL column, so rows are already (ticker, float) pairs
+            rows = cursor.fetchall()
+            prices.update(rows)
         
-        hit_count = sum(1 for p in prices.values() if p is not None)
+        hit_count = len(rows)
         date_msg = f"on {target_date}" if target_date else "(latest)"
         logger.debug(f"Batch cache lookup: {hit_count}/{len(tickers)} hits {date_msg}")
         return prices
@@ -220,7 +393,6 @@ class MarketDataCache:
             return pd.DataFrame()
             
         with self._get_conn() as conn:
-            # Optimize read with pandas directly
             placeholders = ','.join('?' * len(tickers))
             query = f"""
                 SELECT date, ticker, price 
@@ -231,16 +403,36 @@ class MarketDataCache:
             params = (*tickers, start_date, end_date)
             
             try:
-                df = pd.read_sql_query(query, conn, params=params)
+                # Pivot to match yfinance structure: Index=Date, Cols=Tickers, Vals=Price
+                # Rows stream from the cursor straight into (date pos, ticker pos, price)
+                # records, so no list of row tuples or long DataFrame is materialized
+                date_ids: Dict[str, int] = {}
+                ticker_ids: Dict[str, int] = {}
+                records = np.fromiter(
+                    (
+                        (date_ids.setdefault(d, len(date_ids)), ticker_ids.setdefault(t, len(ticker_ids)), p)
+                        for d, t, p in conn.execute(query, params)
+                    ),
+                    dtype=_PRICE_RECORD
+                )
                 
-                if df.empty:
+                if not len(records):
                     return pd.DataFrame()
                 
-                # Pivot to match yfinance structure: Index=Date, Cols=Tickers, Vals=Price
-                df['date'] = pd.to_datetime(df['date'])
-                pivot_df = df.pivot(index='date', columns='ticker', values='price')
+                values = np.full((len(date_ids), len(ticker_ids)), np.nan)
+                values[records['date'], records['ticker']] = records['price']
+                
+                # Dates are stored as ISO text; an explicit format skips per-value inference
+                dates = pd.to_datetime(list(date_ids), format='ISO8601')
+                date_order = np.argsort(dates.values, kind='stable')
+                ticker_keys = list(ticker_ids)
+                ticker_order = sorted(range(len(ticker_keys)), key=ticker_keys.__getitem__)
                 
-                return pivot_df
+                return pd.DataFrame(
+                    values[np.ix_(date_order, ticker_order)],
+                    index=pd.DatetimeIndex(dates[date_order], name='date'),
+                    columns=pd.Index([ticker_keys[i] for i in ticker_order], name='ticker')
+                )
                 
             except Exception as e:
                 logger.error(f"Failed to read historical prices from cache: {e}")
@@ -256,13 +448,10 @@ class MarketDataCache:
             return
             
         with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.executemany(
-                "INSERT OR REPLACE INTO prices (ticker, date, price, source) VALUES (?, ?, ?, ?)",
-                prices_data
-            )
+            self._upsert_rows(conn, 'prices', ('ticker', 'date'), ('price', 'source'), prices_data)
             conn.commit()
             logger.info(f"Bulk cached {len(prices_data)} price records")
+        self._remember(self._price_memo, [((ticker, d), float(price)) for ticker, d, price, _ in prices_data])
     
     # ==================== Split Methods ====================
     
@@ -291,9 +480,8 @@ class MarketDataCache:
             return
             
         with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.executemany(
-                "INSERT OR REPLACE INTO splits (ticker, split_date, ratio) VALUES (?, ?, ?)",
+            self._upsert_rows(
+                conn, 'splits', ('ticker', 'split_date'), ('ratio',),
                 [(ticker, split_date, ratio) for split_date, ratio in splits]
             )
             conn.commit()
@@ -312,47 +500,144 @@ class MarketDataCache:
 
     def get_fx_rate(self, from_curr: str, to_curr: str, target_date: date) -> Optional[float]:
         """Get cached FX rate."""
+        key = (from_curr, to_curr, target_date)
+        rate = self._fx_memo.get(key)
+        if rate is not None:
+            return rate
+        if self._is_recent_miss(key):
+            return None
+        
+        rate = self._query_scalar(
+            "SELECT rate FROM fx_rates WHERE from_curr = ? AND to_curr = ? AND date = ?",
+            (from_curr, to_curr, target_date)
+        )
+        if rate is None:
+            self._record_miss(key)
+            return None
+        self._remember(self._fx_memo, [(key, rate)])
+        return rate
+
+    # Keys per IN (...) query; 3 parameters each keeps us under SQLite's 999 limit
+    _FX_LOOKUP_CHUNK = 300
+
+    def get_fx_rates_batch(self, keys: List[Tuple[str, str, date]]) -> Dict[Tuple[str, str, date], float]:
+        """
+        Get cached FX rates for many (from_curr, to_curr, date) keys.
+        
+        Returns:
+            Dict of the keys found in the cache; missing keys are omitted
+        """
+        rates = {}
+        if not keys:
+            return rates
+        
         with self._get_conn() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT rate FROM fx_rates WHERE from_curr = ? AND to_curr = ? AND date = ?",
-                (from_curr, to_curr, target_date)
-            )
-            result = cursor.fetchone()
-            return float(result[0]) if result else None
+            for i in range(0, len(keys), self._FX_LOOKUP_CHUNK):
+                chunk = keys[i:i + self._FX_LOOKUP_CHUNK]
+                placeholders = ','.join(['(?, ?, ?)'] * len(chunk))
+                cursor.execute(
+                    f"SELECT from_curr, to_curr, date, rate FROM fx_rates "
+                    f"WHERE (from_curr, to_curr, date) IN (VALUES {placeholders})",
+                    [v for key in chunk for v in key]
+                )
+                for from_curr, to_curr, rate_date, rate in cursor.fetchall():
+                    rates[(from_curr, to_curr, date.fromisoformat(rate_date))] = float(rate)
+        
+        logger.debug(f"Batch FX cache lookup: {len(rates)}/{len(keys)} hits")
+        return rates
 
     def set_fx_rate(self, from_curr: str, to_curr: str, target_date: date, rate: float):
         """Cache FX rate."""
         with self._get_conn() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "INSERT OR REPLACE INTO fx_rates (from_curr, to_curr, date, rate) VALUES (?, ?, ?, ?)",
+                _upsert_sql('fx_rates', ('from_curr', 'to_curr', 'date'), ('rate',)),
                 (from_curr, to_curr, target_date, rate)
             )
             conn.commit()
+        self._remember(self._fx_memo, [((from_curr, to_curr, target_date), float(rate))])
+
+    def set_fx_rates_batch(self, rates_data: List[Tuple[str, str, date, float]]):
+        """
+        Batch insert multiple FX rate records in one transaction.
+        Args:
+            rates_data: List of (from_curr, to_curr, date, rate) tuples
+        """
+        if not rates_data:
+            return
+            
+        with self._get_conn() as conn:
+            self._upsert_rows(conn, 'fx_rates', ('from_curr', 'to_curr', 'date'), ('rate',), rates_data)
+            conn.commit()
+            logger.info(f"Bulk cached {len(rates_data)} FX rate records")
+        self._remember(self._fx_memo, [((f, t, d), float(rate)) for f, t, d, rate in rates_data])
 
     # ==================== ISIN Map Methods ====================
 
     def get_isin_mapping(self, isin: str) -> Optional[str]:
         """Get cached ISIN to ticker mapping."""
+        ticker = self._isin_memo.get(isin)
+        if ticker is not None:
+            return ticker
+        
+        ticker = self._query_scalar("SELECT ticker FROM isin_map WHERE isin = ?", (isin,))
+        if ticker is not None:
+            self._remember(self._isin_memo, [(isin, ticker)])
+        return ticker
+
+    def get_isin_mappings(self, isins: List[str]) -> Dict[str, str]:
+        """
+        Get cached ISIN to ticker mappings for many ISINs at once.
+        
+        Returns:
+            Dict of the ISINs that have a cached ticker; others are omitted
+        """
+        mappings = {
+            isin: ticker for isin in isins
+            if (ticker := self._isin_memo.get(isin)) is not None
+        }
+        missing = list(dict.fromkeys(isin for isin in isins if isin not in mappings))
+        if not missing:
+            return mappings
+        
         with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT ticker FROM isin_map WHERE isin = ?",
-                (isin,)
-            )
-            result = cursor.fetchone()
-            return result[0] if result else None
+            for i in range(0, len(missing), _MAX_SQL_PARAMS):
+                chunk = missing[i:i + _MAX_SQL_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT isin, ticker FROM isin_map WHERE isin IN ({placeholders}) AND ticker IS NOT NULL",
+                    chunk
+                ).fetchall()
+                mappings.update(rows)
+                self._remember(self._isin_memo, rows)
+        
+        return mappings
 
     def set_isin_mapping(self, isin: str, ticker: Optional[str], source: str = 'openfigi'):
         """Cache ISIN to ticker mapping."""
+        self.set_isin_mappings([(isin, ticker, source)])
+
+    def set_isin_mappings(self, mappings: List[Tuple[str, Optional[str], str]]):
+        """
+        Cache many ISIN to ticker mappings in one transaction.
+        
+        Args:
+            mappings: List of (isin, ticker, source) tuples
+        """
+        if not mappings:
+            return
+        
         with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT OR REPLACE INTO isin_map (isin, ticker, source) VALUES (?, ?, ?)",
-                (isin, ticker, source)
-            )
+            self._upsert_rows(conn, 'isin_map', ('isin',), ('ticker', 'source'), mappings)
             conn.commit()
+        resolved = []
+        for isin, ticker, _ in mappings:
+            if ticker is None:
+                self._isin_memo.pop(isin, None)
+            else:
+                resolved.append((isin, ticker))
+        self._remember(self._isin_memo, resolved)
 
     # ==================== Transaction Cache Methods ====================
 
@@ -430,14 +715,42 @@ class MarketDataCache:
             cursor.execute("DELETE FROM isin_map")
             conn.commit()
             logger.info("Cleared market data cache (prices, splits, fx, isin)")
+        self.invalidate()
+
+    def invalidate(self, ticker: Optional[str] = None):
+        """
+        Drop in-process memo and miss entries; SQLite rows are untouched.
+        
+        Args:
+            ticker: Only drop price entries for this ticker (all entries if None)
+        """
+        if ticker is None:
+            self._price_memo.clear()
+            self._fx_memo.clear()
+            self._isin_memo.clear()
+            self._misses.clear()
+            return
+        
+        # Iterate over snapshots: FX prefetch workers may write concurrently
+        for key in list(self._price_memo):
+            if key[0] == ticker:
+                self._price_memo.pop(key, None)
+        # FX miss keys are (from, to, date); price miss keys are (ticker, date)
+        for key in list(self._misses):
+            if len(key) == 2 and key[0] == ticker:
+                self._misses.pop(key, None)
 
 # Global cache instance
 _cache_instance: Optional[MarketDataCache] = None 
+_cache_instance_lock = threading.Lock()
 
 
 def get_market_cache() -> MarketDataCache:
     """Get or create global market cache instance."""
     global _cache_instance
     if _cache_instance is None:
-        _cache_instance = MarketDataCache()
+        # FX prefetch workers can get here concurrently; build exactly one
+        with _cache_instance_lock:
+            if _cache_instance is None:
+                _cache_instance = MarketDataCache()
     return _cache_instance
@@ -17,6 +17,27 @@ logger = setup_logger(__name__)
 _fallback_aggregator = MarketDataAggregator()
 
 
+def _download_latest(tickers: List[str]) -> pd.DataFrame:
+    """
+    Download recent daily bars for tickers in one yf.download call.
+    
+    Returns:
+        DataFrame with (ticker, field) MultiIndex columns, even for one ticker
+    """
+    data = yf.download(
+        tickers,
+        period='5d',
+        interval='1d',
+        group_by='ticker',
+        threads=True,
+        progress=False
+    )
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Older yfinance returns flat columns for a single ticker
+        data = pd.concat({tickers[0]: data}, axis=1)
+    return data
+
+
 # Removed redundant st.cache_data - using SQLite cache instead
 def fetch_prices(tickers: List[str]) -> Dict[str, Optional[float]]:
     """
@@ -74,81 +95,63 @@ def fetch_prices(tickers: List[str]) -> Dict[str, Optional[float]]:
         if not mapped_tickers:
             return prices
         
-        # Batch fetch for efficiency
+        # Prices to persist, written in one transaction at the end
+        cache_updates = []
+        
+        # Batch fetch; yfinance fetches the tickers on its own worker threads
         try:
-            data = yf.download(
-                mapped_tickers,
-                period='1d',
-                interval='1d',
-                group_by='ticker',
-                threads=True,
-                progress=False
-            )
-            
-            # Handle single ticker vs multiple tickers
-            if len(mapped_tickers) == 1:
-                mapped_ticker = mapped_tickers[0]
+            data = _download_latest(mapped_tickers)
+        except Exception as e:
+            # Every ticker falls through to the individual fetch below
+            logger.error(f"Batch fetch failed: {e}")
+            data = None
+        
+        if data is not None:
+            for mapped_ticker in mapped_tickers:
                 original_ticker = ticker_map.get(mapped_ticker, mapped_ticker)
-                if not data.empty and 'Close' in data.columns:
-                    price = data['Close'].iloc[-1]
-                    if price is not None and not pd.isna(price):
-                        price_val = float(price)
-                        prices[original_ticker] = price_val
-                        cache.set_price(original_ticker, price_val, today)
-                        logger.info(f"{original_ticker}: {price_val:.2f}")
-                    else:
-                        prices[original_ticker] = None
-                        logger.warning(f"{original_ticker}: No current price available")
-                else:
-                    prices[original_ticker] = None
-                    logger.warning(f"{original_ticker}: Download failed")
-            else:
-                # Multiple tickers
-                for mapped_ticker in mapped_tickers:
-                    original_ticker = ticker_map.get(mapped_ticker, mapped_ticker)
-                    try:
-                        if mapped_ticker in data.columns.levels[0]:
-                            ticker_data = data[mapped_ticker]
-                            if not ticker_data.empty and 'Close' in ticker_data.columns:
-                                price = ticker_data['Close'].iloc[-1]
-                                if price is not None and not pd.isna(price):
-                                    price_val = float(price)
-                                    prices[original_ticker] = price_val
-                                    cache.set_price(original_ticker, price_val, today)
-                                    logger.info(f"{original_ticker}: {price_val:.2f}")
-                                else:
-                                    prices[original_ticker] = None
-                                    logger.warning(f"{original_ticker}: No current price")
+                try:
+                    if mapped_ticker in data.columns.levels[0]:
+                        ticker_data = data[mapped_ticker]
+                        if not ticker_data.empty and 'Close' in ticker_data.columns:
+                            closes = ticker_data['Close'].dropna()
+                            if not closes.empty:
+                                price_val = float(closes.iloc[-1])
+                                prices[original_ticker] = price_val
+                                cache_updates.append((original_ticker, today, price_val, 'yfinance'))
+                                logger.info(f"{original_ticker}: {price_val:.2f}")
                             else:
                                 prices[original_ticker] = None
-                                logger.warning(f"{original_ticker}: No data in response")
+                                logger.warning(f"{original_ticker}: No current price")
                         else:
                             prices[original_ticker] = None
-                            logger.warning(f"{original_ticker}: Not in response")
-                    except Exception as e:
+                            logger.warning(f"{original_ticker}: No data in response")
+                    else:
                         prices[original_ticker] = None
-                        logger.error(f"{original_ticker}: Error extracting price - {e}")
+                        logger.warning(f"{original_ticker}: Not in response")
+                except Exception as e:
+                    prices[original_ticker] = None
+                    logger.error(f"{original_ticker}: Error extracting price - {e}")
+        
+        # Fallback: Individual fetch with original tickers
+        for original_ticker in tickers_to_fetch:
+            if original_ticker in prices:
+                continue  # Skip if already fetched
             
-        except Exception as e:
-            logger.error(f"Batch fetch failed: {e}")
-            # Fallback: Individual fetch with original tickers
-            for original_ticker in tickers_to_fetch:
-                if original_ticker in prices:
-                    continue  # Skip if already fetched
-                
-                # Try mapped ticker first
-                mapped_ticker = ISINResolver.resolve_isin(original_ticker)
-                price = fetch_single_price(mapped_ticker)
-                
-                # If that fails, try fallback providers
-                if price is None and _fallback_aggregator.providers:
-                    logger.info(f"Trying fallback providers for {original_ticker}")
-                    price = _fallback_aggregator.get_price_with_fallback(mapped_ticker)
-                
-                if price is not None:
-                    cache.set_price(original_ticker, price, today)
-                
-                prices[original_ticker] = price
+            # Try mapped ticker first
+            mapped_ticker = ISINResolver.resolve_isin(original_ticker)
+            price = fetch_single_price(mapped_ticker)
+            
+            # If that fails, try fallback providers
+            if price is None and _fallback_aggregator.providers:
+                logger.info(f"Trying fallback providers for {original_ticker}")
+                price = _fallback_aggregator.get_price_with_fallback(mapped_ticker)
+            
+            if price is not None:
+                cache_updates.append((original_ticker, today, price, 'yfinance'))
+            
+            prices[original_ticker] = price
+        
+        cache.set_prices_batch(cache_updates)
         
         success_count = sum(1 for p in prices.values() if p is not None)
         fail_count = len(tickers) - success_count
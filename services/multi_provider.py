@@ -17,6 +17,7 @@ from datetime import date
 import os
 import streamlit as st
 
+from utils.http import get_session
 from utils.logging_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -81,14 +82,13 @@ class AlphaVantageProvider(MarketDataProvider):
              av_symbol = symbol.split(".")[0]
         
         try:
-            import requests
             url = f"https://www.alphavantage.co/query"
             params = {
                 'function': 'GLOBAL_QUOTE',
                 'symbol': av_symbol,
                 'apikey': self.api_key
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = get_session().get(url, params=params, timeout=5)
             data = response.json()
             
             if 'Global Quote' in data and '05. price' in data['Global Quote']:
@@ -109,7 +109,6 @@ class AlphaVantageProvider(MarketDataProvider):
             return None
         
         try:
-            import requests
             url = f"https://www.alphavantage.co/query"
             params = {
                 'function': 'TIME_SERIES_DAILY',
@@ -117,7 +116,7 @@ class AlphaVantageProvider(MarketDataProvider):
                 'apikey': self.api_key,
                 'outputsize': 'compact'
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = get_session().get(url, params=params, timeout=5)
             data = response.json()
             
             if 'Time Series (Daily)' in data:
@@ -161,13 +160,12 @@ class FinnhubProvider(MarketDataProvider):
              fh_symbol = symbol.split(".")[0]
         
         try:
-            import requests
             url = f"https://finnhub.io/api/v1/quote"
             params = {
                 'symbol': fh_symbol,
                 'token': self.api_key
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = get_session().get(url, params=params, timeout=5)
             data = response.json()
             
             if 'c' in data and data['c'] > 0:  # 'c' is current price
@@ -185,13 +183,12 @@ class FinnhubProvider(MarketDataProvider):
             return None
         
         try:
-            import requests
             url = f"https://finnhub.io/api/v1/search"
             params = {
                 'q': isin,
                 'token': self.api_key
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = get_session().get(url, params=params, timeout=5)
             data = response.json()
             
             if 'result' in data and len(data['result']) > 0:
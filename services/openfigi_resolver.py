@@ -10,6 +10,7 @@ import time
 from typing import Optional, Dict, List
 from datetime import datetime, timedelta
 
+from utils.http import get_session
 from utils.logging_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -75,7 +76,7 @@ class OpenFIGIResolver:
         }]
         
         try:
-            response = requests.post(
+            response = get_session().post(
                 self.API_URL,
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -188,9 +189,10 @@ class OpenFIGIResolver:
         results = {}
         to_fetch = []
         
-        # 1. Check Cache
+        # 1. Check Cache (one query for the whole batch)
+        cached_mappings = self.cache_store.get_isin_mappings(isins)
         for isin in isins:
-            cached = self.cache_store.get_isin_mapping(isin)
+            cached = cached_mappings.get(isin)
             if cached:
                 results[isin] = cached
             elif isin and len(isin) == 12: # Only valid ISINs
@@ -205,6 +207,7 @@ class OpenFIGIResolver:
         
         # 2. Chunk into groups of 10 (OpenFIGI limit)
         CHUNK_SIZE = 10
+        resolved = []
         for i in range(0, len(to_fetch), CHUNK_SIZE):
             chunk = to_fetch[i:i + CHUNK_SIZE]
             
@@ -216,7 +219,7 @@ class OpenFIGIResolver:
             
             try:
                 logger.info(f"Fetching OpenFIGI batch {i//CHUNK_SIZE + 1} ({len(chunk)} items)...")
-                response = requests.post(
+                response = get_session().post(
                     self.API_URL,
                     json=payload,
                     headers={"Content-Type": "application/json"},
@@ -236,7 +239,7 @@ class OpenFIGIResolver:
                             ticker = self._extract_best_ticker(item_result['data'], original_isin)
                             if ticker:
                                 results[original_isin] = ticker
-                                self.cache_store.set_isin_mapping(original_isin, ticker)
+                                resolved.append((original_isin, ticker, 'openfigi'))
                                 logger.debug(f"Resolved {original_isin} -> {ticker}")
                             else:
                                 results[original_isin] = None
@@ -256,6 +259,9 @@ class OpenFIGIResolver:
                 logger.error(f"OpenFIGI batch exception: {e}")
                 for isin in chunk:
                     results[isin] = None
+        
+        # 3. Persist all new mappings in one transaction
+        self.cache_store.set_isin_mappings(resolved)
             
         return results
     
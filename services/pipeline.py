@@ -48,7 +48,12 @@ def process_data_pipeline(file_content: str):
             fetch_splits=True
         )
         
-        # FX Rates
+        # FX Rates (distinct currency/date pairs fetched concurrently up front)
+        FXRateService.prefetch_rates(
+            (t.original_currency, t.date.date()) for t in transactions
+            if t.original_currency != 'EUR'
+        )
+        
         fx_conversions = 0
         for trans in transactions:
             if trans.original_currency != 'EUR':
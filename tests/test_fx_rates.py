@@ -0,0 +1,197 @@
+"""
+Unit Tests for FX Rate Service
+
+Tests ECB CSV parsing, range prefetching and the publication calendar with
+the network mocked.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import services.fx_rates as fx_rates
+from services.fx_rates import CentralBankRateFetcher, FXRateService
+from services.market_cache import MarketDataCache
+
+
+ECB_HEADER = (
+    "KEY,FREQ,CURRENCY,CURRENCY_DENOM,EXR_TYPE,EXR_SUFFIX,TIME_PERIOD,OBS_VALUE,"
+    "OBS_STATUS,TITLE"
+)
+
+
+def ecb_csv(rows):
+    """Build an ECB csvdata payload for USD from (date, value) pairs."""
+    lines = [ECB_HEADER]
+    for day, value in rows:
+        lines.append(
+            f'EXR.D.USD.EUR.SP00.A,D,USD,EUR,SP00,A,{day},{value},A,'
+            f'"US dollar/Euro, daily, ECB reference rate"'
+        )
+    return "\n".join(lines) + "\n"
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Records GET calls and answers each with a canned ECB payload."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        return FakeResponse(self.text)
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """Start and end every test with empty in-process FX caches."""
+    FXRateService.clear_cache()
+    yield
+    FXRateService.clear_cache()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Route FX persistence to a fresh database file."""
+    store = MarketDataCache(db_path=str(tmp_path / "market_cache.db"))
+    monkeypatch.setattr(fx_rates, "get_market_cache", lambda: store)
+    return store
+
+
+class TestParseECBCSV:
+    """Test _parse_ecb_csv."""
+
+    def test_parses_rows(self):
+        """Dates and values are read from the named columns, quoted titles included."""
+        rates = CentralBankRateFetcher._parse_ecb_csv(
+            ecb_csv([("2024-01-02", "1.0956"), ("2024-01-03", "1.0919")])
+        )
+
+        assert rates == {date(2024, 1, 2): 1.0956, date(2024, 1, 3): 1.0919}
+
+    def test_reordered_columns(self):
+        """Column positions come from the header, not a fixed layout."""
+        text = (
+            'OBS_VALUE,TITLE,TIME_PERIOD\n'
+            '1.10,"US dollar/Euro, daily",2024-01-02\n'
+        )
+
+        assert CentralBankRateFetcher._parse_ecb_csv(text) == {date(2024, 1, 2): 1.10}
+
+    def test_empty_and_nan_values_skipped(self):
+        """Rows without an observation are left out."""
+        rates = CentralBankRateFetcher._parse_ecb_csv(
+            ecb_csv([("2024-01-02", ""), ("2024-01-03", "NaN"), ("2024-01-04", "1.09")])
+        )
+
+        assert rates == {date(2024, 1, 4): 1.09}
+
+    def test_missing_columns(self):
+        """A payload without the expected columns yields no rates."""
+        assert CentralBankRateFetcher._parse_ecb_csv("") == {}
+        assert CentralBankRateFetcher._parse_ecb_csv("FOO,BAR\n1,2\n") == {}
+
+
+class TestECBRangePrefetch:
+    """Test fetch_ecb_range and prefetch_rates with the network mocked."""
+
+    def test_fetch_ecb_range_single_request(self, monkeypatch):
+        """One request covers the whole range and warms the per-day memo."""
+        session = FakeSession(ecb_csv([("2024-01-02", "1.0956"), ("2024-01-03", "1.0919")]))
+        monkeypatch.setattr(fx_rates, "get_session", lambda: session)
+
+        rates = CentralBankRateFetcher.fetch_ecb_range("USD", date(2024, 1, 2), date(2024, 1, 3))
+
+        assert rates == {date(2024, 1, 2): 1.0956, date(2024, 1, 3): 1.0919}
+        assert len(session.calls) == 1
+        assert session.calls[0][1]["startPeriod"] == "2024-01-02"
+        assert session.calls[0][1]["endPeriod"] == "2024-01-03"
+        assert CentralBankRateFetcher._fetch_ecb_direct("USD", date(2024, 1, 3)) == 1.0919
+        assert len(session.calls) == 1
+
+    def test_prefetch_fills_rate_cache(self, cache, monkeypatch):
+        """prefetch_rates persists a range fetch and serves every pair from it."""
+        session = FakeSession(ecb_csv([("2024-01-02", "1.25"), ("2024-01-03", "1.6")]))
+        monkeypatch.setattr(fx_rates, "get_session", lambda: session)
+
+        pairs = [("USD", date(2024, 1, 2)), ("USD", date(2024, 1, 3))]
+        results = FXRateService.prefetch_rates(pairs)
+
+        assert len(session.calls) == 1
+        assert results[("USD", date(2024, 1, 2))] == (Decimal("0.8"), "cache")
+        assert results[("USD", date(2024, 1, 3))] == (Decimal("0.625"), "cache")
+        assert fx_rates._RATE_CACHE[("USD", "EUR", date(2024, 1, 3), True)] == (Decimal("0.625"), "cache")
+        assert cache.get_fx_rate("USD", "EUR", date(2024, 1, 2)) == 0.8
+
+        # Later lookups are in-process hits; no further requests
+        assert FXRateService.get_rate("USD", "EUR", date(2024, 1, 2)) == (Decimal("0.8"), "cache")
+        assert len(session.calls) == 1
+
+
+class TestECBCalendar:
+    """Test weekend/TARGET holiday handling."""
+
+    @pytest.mark.parametrize("day", [
+        date(2024, 1, 1),    # New Year
+        date(2024, 3, 29),   # Good Friday
+        date(2024, 4, 1),    # Easter Monday
+        date(2024, 5, 1),    # Labour Day
+        date(2024, 12, 25),  # Christmas
+        date(2024, 12, 26),  # Boxing Day
+        date(2024, 1, 6),    # Saturday
+        date(2024, 1, 7),    # Sunday
+    ])
+    def test_non_publication_days(self, day):
+        """Weekends and TARGET holidays have no ECB rates."""
+        assert not fx_rates._is_ecb_publication_day(day)
+
+    def test_publication_days(self):
+        """Ordinary weekdays, including Maundy Thursday and Christmas Eve, are publication days."""
+        assert fx_rates._is_ecb_publication_day(date(2024, 1, 2))
+        assert fx_rates._is_ecb_publication_day(date(2024, 3, 28))
+        assert fx_rates._is_ecb_publication_day(date(2024, 12, 24))
+
+    def test_previous_publication_day(self):
+        """Non-publication days fall back to the latest earlier publication day."""
+        assert fx_rates._ecb_publication_day(date(2024, 1, 2)) == date(2024, 1, 2)
+        assert fx_rates._ecb_publication_day(date(2024, 1, 7)) == date(2024, 1, 5)
+        assert fx_rates._ecb_publication_day(date(2024, 4, 1)) == date(2024, 3, 28)
+        assert fx_rates._ecb_publication_day(date(2024, 12, 26)) == date(2024, 12, 24)
+        assert fx_rates._ecb_publication_day(date(2024, 1, 1)) == date(2023, 12, 29)
+
+    def test_direct_fetch_uses_previous_publication_day(self, monkeypatch):
+        """A holiday lookup requests and returns the previous publication day's rate."""
+        session = FakeSession(ecb_csv([("2024-03-28", "1.0811")]))
+        monkeypatch.setattr(fx_rates, "get_session", lambda: session)
+
+        assert CentralBankRateFetcher._fetch_ecb_direct("USD", date(2024, 4, 1)) == 1.0811
+        assert session.calls[0][1]["startPeriod"] == "2024-03-28"
+
+        # Good Friday resolves to the same publication day, already memoized
+        assert CentralBankRateFetcher._fetch_ecb_direct("USD", date(2024, 3, 29)) == 1.0811
+        assert len(session.calls) == 1
+
+    def test_prefetch_stores_holiday_dates(self, cache, monkeypatch):
+        """Range prefetch stores the in-force rate under weekend/holiday dates too."""
+        session = FakeSession(ecb_csv([("2024-03-28", "1.25"), ("2024-04-02", "1.6")]))
+        monkeypatch.setattr(fx_rates, "get_session", lambda: session)
+
+        pairs = [("USD", date(2024, 3, 30)), ("USD", date(2024, 4, 2))]
+        results = FXRateService.prefetch_rates(pairs)
+
+        assert len(session.calls) == 1
+        assert session.calls[0][1]["startPeriod"] == "2024-03-28"
+        assert results[("USD", date(2024, 3, 30))] == (Decimal("0.8"), "cache")
+        assert cache.get_fx_rate("USD", "EUR", date(2024, 3, 30)) == 0.8
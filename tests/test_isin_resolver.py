@@ -0,0 +1,74 @@
+"""
+Unit Tests for ISINResolver
+
+Tests memoization of resolve_isin with the OpenFIGI resolver mocked.
+"""
+
+import pytest
+
+import services.openfigi_resolver as openfigi_resolver
+from services.isin_resolver import ISINResolver
+
+
+class FakeOpenFIGI:
+    """Counts lookups and answers from a fixed ISIN -> ticker table."""
+
+    def __init__(self, table):
+        self.table = table
+        self.calls = []
+
+    def resolve_isin(self, isin):
+        self.calls.append(isin)
+        return self.table.get(isin)
+
+
+@pytest.fixture
+def figi(monkeypatch):
+    """Mock OpenFIGI and start every test with an empty memo."""
+    fake = FakeOpenFIGI({"US0378331005": "AAPL"})
+    monkeypatch.setattr(openfigi_resolver, "get_openfigi_resolver", lambda: fake)
+    ISINResolver.clear_cache()
+    yield fake
+    ISINResolver.clear_cache()
+
+
+class TestResolveISINCache:
+    """Test the lru_cache behind resolve_isin."""
+
+    def test_success_is_cached(self, figi):
+        """A resolved ISIN hits OpenFIGI once."""
+        assert ISINResolver.resolve_isin("US0378331005") == "AAPL"
+        assert ISINResolver.resolve_isin("US0378331005") == "AAPL"
+
+        assert figi.calls == ["US0378331005"]
+
+    def test_failure_is_not_cached(self, figi):
+        """An unresolved ISIN is returned as-is and retried on the next call."""
+        assert ISINResolver.resolve_isin("US5949181045") == "US5949181045"
+        assert ISINResolver.resolve_isin("US5949181045") == "US5949181045"
+        assert figi.calls == ["US5949181045", "US5949181045"]
+
+        # Once OpenFIGI knows it, the next call picks it up
+        figi.table["US5949181045"] = "MSFT"
+        assert ISINResolver.resolve_isin("US5949181045") == "MSFT"
+
+    def test_clear_cache(self, figi):
+        """clear_cache() forces the next call to resolve again."""
+        ISINResolver.resolve_isin("US0378331005")
+        figi.table["US0378331005"] = "AAPL.NEW"
+
+        assert ISINResolver.resolve_isin("US0378331005") == "AAPL"
+
+        ISINResolver.clear_cache()
+
+        assert ISINResolver.resolve_isin("US0378331005") == "AAPL.NEW"
+        assert len(figi.calls) == 2
+
+    def test_overrides_and_fallbacks_skip_openfigi(self, figi):
+        """Overrides, explicit fallback tickers and non-ISINs never reach OpenFIGI."""
+        assert ISINResolver.resolve_isin("US8740391003") == "TSM"
+        assert ISINResolver.resolve_isin("DE0007164600", "SAP.DE") == "SAP.DE"
+        assert ISINResolver.resolve_isin("AAPL") == "AAPL"
+        assert ISINResolver.resolve_isin("") == ""
+
+        assert figi.calls == []
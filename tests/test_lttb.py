@@ -0,0 +1,51 @@
+"""
+Unit Tests for LTTB Downsampling
+
+Tests point selection, endpoint preservation, and pass-through for short series.
+"""
+
+import numpy as np
+
+from utils.lttb import lttb_indices
+
+
+class TestLTTB:
+    """Test lttb_indices selection."""
+
+    def test_short_series_passthrough(self):
+        """Series at or below the threshold are returned untouched."""
+        x = np.arange(10)
+        y = np.arange(10) * 2.0
+
+        assert np.array_equal(lttb_indices(x, y, 10), np.arange(10))
+        assert np.array_equal(lttb_indices(x, y, 50), np.arange(10))
+
+    def test_small_threshold_passthrough(self):
+        """Thresholds below 3 cannot keep both endpoints plus a bucket; every index is returned."""
+        x = np.arange(100)
+        y = np.cos(x / 10.0)
+
+        for threshold in (0, 1, 2):
+            assert np.array_equal(lttb_indices(x, y, threshold), np.arange(100))
+
+    def test_downsampled_length_and_order(self):
+        """Result has exactly threshold points, strictly increasing, with both endpoints."""
+        x = np.arange(5000)
+        y = np.sin(x / 100.0)
+
+        idx = lttb_indices(x, y, 1500)
+
+        assert len(idx) == 1500
+        assert idx[0] == 0
+        assert idx[-1] == 4999
+        assert np.all(np.diff(idx) > 0)
+
+    def test_preserves_spike(self):
+        """A single extreme point survives downsampling."""
+        x = np.arange(3000)
+        y = np.zeros(3000)
+        y[1777] = 100.0
+
+        idx = lttb_indices(x, y, 100)
+
+        assert 1777 in idx
@@ -0,0 +1,211 @@
+"""
+Unit Tests for MarketDataCache
+
+Tests the historical price pivot, chunked batch reads/writes, in-process
+memos, miss TTL, and scoped invalidation against a temporary database.
+"""
+
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import services.market_cache as market_cache
+from services.market_cache import MarketDataCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Provide a cache backed by a fresh database file."""
+    return MarketDataCache(db_path=str(tmp_path / "market_cache.db"))
+
+
+class TestHistoricalPrices:
+    """Test get_historical_prices pivoting."""
+
+    def test_pivot_with_gaps(self, cache):
+        """Dates and tickers are sorted and missing cells are NaN."""
+        cache.set_prices_batch([
+            ("MSFT", date(2024, 1, 3), 3.0, "test"),
+            ("AAPL", date(2024, 1, 2), 1.0, "test"),
+            ("MSFT", date(2024, 1, 2), 2.0, "test"),
+            ("AAPL", date(2024, 1, 4), 4.0, "test"),
+        ])
+
+        df = cache.get_historical_prices(["MSFT", "AAPL"], date(2024, 1, 1), date(2024, 1, 31))
+
+        assert list(df.columns) == ["AAPL", "MSFT"]
+        assert [d.date() for d in df.index] == [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+        assert df.loc["2024-01-02", "AAPL"] == 1.0
+        assert df.loc["2024-01-02", "MSFT"] == 2.0
+        assert np.isnan(df.loc["2024-01-03", "AAPL"])
+        assert np.isnan(df.loc["2024-01-04", "MSFT"])
+
+    def test_date_range_filter(self, cache):
+        """Rows outside the range are excluded; an empty result is an empty frame."""
+        cache.set_prices_batch([("AAPL", date(2024, 1, 2), 1.0, "test")])
+
+        assert cache.get_historical_prices(["AAPL"], date(2024, 2, 1), date(2024, 2, 28)).empty
+        assert cache.get_historical_prices([], date(2024, 1, 1), date(2024, 1, 31)).empty
+
+
+class TestBatchOperations:
+    """Test batches larger than one SQL statement's parameter limit."""
+
+    def test_prices_batch_above_param_limit(self, cache):
+        """Upserts are split into several statements and all rows land."""
+        start = date(2020, 1, 1)
+        rows = [("AAPL", start + timedelta(days=i), float(i), "test") for i in range(600)]
+        cache.set_prices_batch(rows)
+        cache.invalidate()
+
+        df = cache.get_historical_prices(["AAPL"], start, start + timedelta(days=599))
+
+        assert len(df) == 600
+        assert df["AAPL"].iloc[-1] == 599.0
+
+    def test_fx_rates_batch_above_chunk_size(self, cache):
+        """Row-value IN lookups are chunked and misses are omitted."""
+        start = date(2020, 1, 1)
+        rows = [("USD", "EUR", start + timedelta(days=i), 1.0 + i / 1000) for i in range(700)]
+        cache.set_fx_rates_batch(rows)
+
+        keys = [(f, t, d) for f, t, d, _ in rows] + [("GBP", "EUR", start)]
+        rates = cache.get_fx_rates_batch(keys)
+
+        assert len(rates) == 700
+        assert rates[("USD", "EUR", start + timedelta(days=699))] == pytest.approx(1.699)
+        assert ("GBP", "EUR", start) not in rates
+
+    def test_isin_mappings_above_param_limit(self, cache):
+        """Bulk ISIN lookups are chunked; null tickers are not returned."""
+        mappings = [(f"XX{i:010d}", f"T{i}", "test") for i in range(1200)]
+        mappings.append(("XX9999999999", None, "test"))
+        cache.set_isin_mappings(mappings)
+        cache.invalidate()
+
+        found = cache.get_isin_mappings([isin for isin, _, _ in mappings])
+
+        assert len(found) == 1200
+        assert found["XX0000001199"] == "T1199"
+        assert "XX9999999999" not in found
+
+    def test_null_ticker_clears_memo(self, cache):
+        """Re-mapping an ISIN to None drops the memoized ticker."""
+        cache.set_isin_mapping("US0378331005", "AAPL")
+        cache.set_isin_mapping("US0378331005", None)
+
+        assert cache.get_isin_mapping("US0378331005") is None
+        assert cache.get_isin_mappings(["US0378331005"]) == {}
+
+
+class TestMemoAndMisses:
+    """Test in-process memos, miss TTL and invalidation."""
+
+    def test_miss_ttl_expiry(self, cache, monkeypatch):
+        """A recorded miss hides rows written behind the cache until it expires."""
+        now = [1000.0]
+        monkeypatch.setattr(market_cache.time, "monotonic", lambda: now[0])
+        day = date(2024, 1, 2)
+
+        assert cache.get_price("AAPL", day) is None
+
+        # Write directly to SQLite so the memo is not updated
+        with cache._get_conn() as conn:
+            conn.execute(
+                "INSERT INTO prices (ticker, date, price, source) VALUES (?, ?, ?, ?)",
+                ("AAPL", day, 5.0, "test")
+            )
+            conn.commit()
+
+        now[0] += market_cache._MISS_TTL_SECONDS - 1
+        assert cache.get_price("AAPL", day) is None
+
+        now[0] += 2
+        assert cache.get_price("AAPL", day) == 5.0
+
+    def test_setter_overrides_miss(self, cache):
+        """Writing through the cache makes a previous miss visible at once."""
+        day = date(2024, 1, 2)
+        assert cache.get_fx_rate("USD", "EUR", day) is None
+
+        cache.set_fx_rate("USD", "EUR", day, 0.9)
+
+        assert cache.get_fx_rate("USD", "EUR", day) == 0.9
+
+    def test_invalidate_ticker_keeps_others(self, cache):
+        """invalidate(ticker) only drops that ticker's prices and misses."""
+        day = date(2024, 1, 2)
+        cache.set_price("AAPL", 1.0, day)
+        cache.set_price("MSFT", 2.0, day)
+        cache.set_fx_rate("USD", "EUR", day, 0.9)
+        cache.get_price("AAPL", date(2024, 1, 3))
+        cache.get_fx_rate("GBP", "EUR", day)
+
+        cache.invalidate("AAPL")
+
+        assert ("AAPL", day) not in cache._price_memo
+        assert ("AAPL", date(2024, 1, 3)) not in cache._misses
+        assert cache._price_memo[("MSFT", day)] == 2.0
+        assert ("USD", "EUR", day) in cache._fx_memo
+        assert ("GBP", "EUR", day) in cache._misses
+        # Still served from SQLite
+        assert cache.get_price("AAPL", day) == 1.0
+
+    def test_invalidate_all(self, cache):
+        """invalidate() empties every memo without touching SQLite."""
+        day = date(2024, 1, 2)
+        cache.set_price("AAPL", 1.0, day)
+        cache.set_isin_mapping("US0378331005", "AAPL")
+
+        cache.invalidate()
+
+        assert not cache._price_memo and not cache._isin_memo and not cache._misses
+        assert cache.get_price("AAPL", day) == 1.0
+        assert cache.get_isin_mapping("US0378331005") == "AAPL"
+
+    def test_memo_cap(self, cache, monkeypatch):
+        """A memo that would exceed its cap is emptied before the write."""
+        monkeypatch.setattr(market_cache, "_MEMO_MAX_ENTRIES", 3)
+        start = date(2024, 1, 1)
+
+        for i in range(5):
+            cache.set_price("AAPL", float(i), start + timedelta(days=i))
+
+        assert len(cache._price_memo) <= 3
+        assert cache.get_price("AAPL", start) == 0.0
+
+    def test_bulk_write_above_cap_skips_memo(self, cache, monkeypatch):
+        """A batch larger than the cap keeps the memo within it and leaves hot entries alone."""
+        monkeypatch.setattr(market_cache, "_MEMO_MAX_ENTRIES", 3)
+        start = date(2024, 1, 1)
+        cache.set_price("MSFT", 1.0, start)
+        cache.set_price("AAPL", 1.0, start)
+
+        cache.set_prices_batch([
+            ("AAPL", start + timedelta(days=i), 10.0 + i, "test") for i in range(10)
+        ])
+
+        assert len(cache._price_memo) <= 3
+        assert cache._price_memo[("MSFT", start)] == 1.0
+        # The overwritten row is not served from a stale memo copy
+        assert ("AAPL", start) not in cache._price_memo
+        assert cache.get_price("AAPL", start) == 10.0
+        assert cache.get_price("AAPL", start + timedelta(days=9)) == 19.0
+
+
+class TestConnections:
+    """Test per-thread connection handling."""
+
+    def test_connection_per_thread(self, cache):
+        """Each thread gets its own connection, reused within the thread."""
+        main_conn = cache._get_conn()
+        assert cache._get_conn() is main_conn
+
+        other = []
+        worker = threading.Thread(target=lambda: other.append(cache._get_conn()))
+        worker.start()
+        worker.join()
+
+        assert other[0] is not main_conn
@@ -153,6 +153,30 @@ class TestTransactionStore:
         assert result2.added == 0
         assert result2.skipped == 3  # All should be skipped as duplicates
     
+    def test_deduplication_within_batch(self, temp_db, sample_transactions):
+        """Test that repeats inside a single import are skipped too."""
+        batch = sample_transactions + [sample_transactions[0]]
+        
+        result = temp_db.append_transactions(batch, source_name="Broker1")
+        
+        assert result.added == 3
+        assert result.skipped == 1
+        assert len(temp_db.get_all_transactions()) == 3
+    
+    def test_keep_all_isolates_conflicting_rows(self, temp_db, sample_transactions):
+        """Test that a hash collision under keep_all only fails that row."""
+        temp_db.append_transactions(sample_transactions[:1], source_name="Broker1")
+        
+        result = temp_db.append_transactions(
+            sample_transactions,
+            source_name="Broker2",
+            dedup_strategy="keep_all"
+        )
+        
+        assert result.added == 2
+        assert len(result.errors) == 1
+        assert len(temp_db.get_all_transactions()) == 3
+    
     def test_get_all_transactions(self, temp_db, sample_transactions):
         """Test retrieving all transactions."""
         temp_db.append_transactions(sample_transactions, "TestSource")
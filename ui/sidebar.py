@@ -8,6 +8,8 @@
 
 import streamlit as st
 from services.market_cache import get_market_cache
+from services.fx_rates import FXRateService
+from services.isin_resolver import ISINResolver
 from services.pipeline import parse_csv_only, process_data_pipeline
 from calculators.transaction_store import TransactionStore
 from utils.logging_config import setup_logger
@@ -264,7 +266,8 @@ def render_sidebar_controls():
                     if quick_transactions:
                         sample_isins = [t.ticker for t in quick_transactions[:10] if t.ticker and len(t.ticker) == 12]
                         if sample_isins:
-                            cached_mappings = sum(1 for isin in sample_isins if cache.get_isin_mapping(isin))
+                            known = cache.get_isin_mappings(sample_isins)
+                            cached_mappings = sum(1 for isin in sample_isins if isin in known)
                             if cached_mappings >= len(sample_isins) * 0.5:
                                 st.session_state.enrichment_done = True
                 except:
@@ -284,6 +287,9 @@ def render_sidebar_controls():
         with col_act2:
             if st.button("PURGE CACHE"):
                 cache.clear_cache()
+                # In-process caches sit above SQLite and would go stale otherwise
+                FXRateService.clear_cache()
+                ISINResolver.clear_cache()
                 st.rerun()
 
         st.markdown("---")
@@ -0,0 +1,61 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) Downsampling
+
+Reduces a line series to a fixed number of points while keeping its visual
+shape (peaks, troughs, steps). Used to keep long daily histories light in
+the browser without changing how the chart looks.
+"""
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select the indices of the points LTTB keeps.
+
+    Args:
+        x: Monotonic x values (numeric)
+        y: y values, same length as x
+        threshold: Number of points to keep (first and last are always kept);
+            below 3 there is nothing to downsample and every index is returned
+
+    Returns:
+        Sorted int64 index array of length min(len(x), threshold), or of
+        length len(x) when threshold < 3
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n, dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket boundaries for the inner points (first/last are fixed)
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Per-bucket centroids, computed once; bucket i uses centroid i + 1
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    avg_x = np.append(avg_x[1:], x[n - 1])
+    avg_y = np.append(avg_y[1:], y[n - 1])
+
+    idx = np.empty(threshold, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area (constant factor doesn't affect argmax)
+        area = np.abs(
+            (ax - avg_x[i]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (avg_y[i] - ay)
+        )
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+
+    return idx